@@ -1,14 +1,16 @@
 from dotenv import load_dotenv
 load_dotenv()
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, stream_with_context
+from flask.json.provider import DefaultJSONProvider, JSONProvider
 from flask_cors import CORS
+import orjson
 import os
 import json
 import openai
 from datetime import datetime
 import logging
 from knowledge_base import CUNYKnowledgeBase
-from chatbot import CUNYChatbot
+from chatbot import CUNYChatbot, MAX_HISTORY_MESSAGES
 
 
 #conversation_logger = ConversationLogger()
@@ -17,8 +19,30 @@ from chatbot import CUNYChatbot
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(JSONProvider):
+    """Serve jsonify() and request.get_json() through orjson"""
+    
+    option = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option, default=DefaultJSONProvider.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand orjson's bytes straight to the response instead of round-tripping through str
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option, default=DefaultJSONProvider.default),
+            mimetype="application/json"
+        )
+
 app = Flask(__name__)
-CORS(app)
+app.json = ORJSONProvider(app)
+# Only the JSON API needs cross-origin access; set CORS_ORIGINS to a comma-separated
+# list of allowed origins in production instead of the wildcard
+CORS(app, resources={r"/api/*": {"origins": os.getenv('CORS_ORIGINS', '*').split(',')}})
 
 # Initialize OpenAI client
 openai.api_key = os.getenv('OPENAI_API_KEY')
@@ -32,16 +56,26 @@ def index():
     """Serve the main chat interface"""
     return render_template('index.html')
 
+def _request_history(data):
+    """Return the newest MAX_HISTORY_MESSAGES turns of a request's history, or None if it is not a list"""
+    history = data.get('history') or []
+    if not isinstance(history, list):
+        return None
+    # Bound what a long-running session can send us; only the newest turns are used
+    return history[-MAX_HISTORY_MESSAGES:]
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Handle chat messages"""
     try:
         data = request.get_json()
         user_message = data.get('message', '')
-        conversation_history = data.get('history', [])
+        conversation_history = _request_history(data)
         
-        if not user_message.strip():
+        if not isinstance(user_message, str) or not user_message.strip():
             return jsonify({'error': 'Message cannot be empty'}), 400
+        if conversation_history is None:
+            return jsonify({'error': 'History must be a list'}), 400
         
         # Get response from chatbot
         response = chatbot.get_response(user_message, conversation_history)
@@ -55,45 +89,98 @@ def chat():
         logger.error(f"Error in chat endpoint: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Handle chat messages, streaming the response as Server-Sent Events"""
+    try:
+        data = request.get_json(silent=True) or {}
+        user_message = data.get('message', '')
+        conversation_history = _request_history(data)
+        
+        if not isinstance(user_message, str) or not user_message.strip():
+            return jsonify({'error': 'Message cannot be empty'}), 400
+        if conversation_history is None:
+            return jsonify({'error': 'History must be a list'}), 400
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    def events():
+        try:
+            for piece in chatbot.get_response_stream(user_message, conversation_history):
+                yield b"data: " + orjson.dumps({'delta': piece}) + b"\n\n"
+        except Exception as e:
+            # Headers are already sent, so the failure is reported in-band; clients
+            # can tell it from a finished answer, which ends with a done event
+            logger.error(f"Error in chat stream: {str(e)}")
+            yield b"event: error\ndata: " + orjson.dumps({'error': 'Internal server error'}) + b"\n\n"
+            return
+        yield b"event: done\ndata: " + orjson.dumps({'timestamp': datetime.now().isoformat()}) + b"\n\n"
+    
+    response = app.response_class(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # keep proxies from buffering the stream
+    return response
+
+# Static payloads are serialized once at import; their views just return the bytes
+QUICK_QUESTIONS = [
+    "What are the admission requirements?",
+    "How much is tuition?",
+    "What scholarships are available?",
+    "When are the application deadlines?",
+    "What majors are offered?",
+    "How do I schedule a campus tour?",
+    "What housing options are available?",
+    "What meal plans are offered?",
+    "How safe is the campus?",
+    "What student activities are available?"
+]
+CAMPUS_INFO = {
+    'name': 'City University of New York (CUNY)',
+    'campuses': [
+        'Baruch College',
+        'Brooklyn College', 
+        'City College',
+        'Hunter College',
+        'Queens College',
+        'Lehman College',
+        'College of Staten Island',
+        'York College',
+        'Medgar Evers College',
+        'John Jay College of Criminal Justice'
+    ],
+    'total_students': '275,000+',
+    'founded': '1847',
+    'type': 'Public University System'
+}
+_QUICK_QUESTIONS_JSON = orjson.dumps({'questions': QUICK_QUESTIONS})
+_CAMPUS_INFO_JSON = orjson.dumps(CAMPUS_INFO)
+STATIC_CACHE_CONTROL = 'public, max-age=3600'
+
+def _static_json_response(body: bytes):
+    """Wrap pre-serialized JSON in a cacheable response"""
+    response = app.response_class(body, mimetype='application/json')
+    response.headers['Cache-Control'] = STATIC_CACHE_CONTROL
+    return response
+
 @app.route('/api/quick-questions', methods=['GET'])
 def get_quick_questions():
     """Get common questions for quick access"""
-    quick_questions = [
-        "What are the admission requirements?",
-        "How much is tuition?",
-        "What scholarships are available?",
-        "When are the application deadlines?",
-        "What majors are offered?",
-        "How do I schedule a campus tour?",
-        "What housing options are available?",
-        "What meal plans are offered?",
-        "How safe is the campus?",
-        "What student activities are available?"
-    ]
-    return jsonify({'questions': quick_questions})
+    return _static_json_response(_QUICK_QUESTIONS_JSON)
 
 @app.route('/api/campus-info', methods=['GET'])
 def get_campus_info():
     """Get basic campus information"""
-    campus_info = {
-        'name': 'City University of New York (CUNY)',
-        'campuses': [
-            'Baruch College',
-            'Brooklyn College', 
-            'City College',
-            'Hunter College',
-            'Queens College',
-            'Lehman College',
-            'College of Staten Island',
-            'York College',
-            'Medgar Evers College',
-            'John Jay College of Criminal Justice'
-        ],
-        'total_students': '275,000+',
-        'founded': '1847',
-        'type': 'Public University System'
-    }
-    return jsonify(campus_info)
+    return _static_json_response(_CAMPUS_INFO_JSON)
+
+@app.route('/api/knowledge/<category>', methods=['GET'])
+@app.route('/api/knowledge/<category>/<subcategory>', methods=['GET'])
+def get_knowledge(category, subcategory=None):
+    """Get one knowledge base category, or one of its subcategories"""
+    body = knowledge_base.get_specific_info_json(category, subcategory)
+    if body is None:
+        return jsonify({'error': 'Unknown category'}), 404
+    return _static_json_response(body)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -114,10 +201,10 @@ def health_check():
 def get_analytics():
     """Get conversation analytics for OAREDA"""
     try:
-        from conversation_logger import conversation_logger
+        from conversation_logger import get_conversation_logger
         
         # Get stats for last 24 hours
-        stats = conversation_logger.get_conversation_stats(hours=24)
+        stats = get_conversation_logger().get_conversation_stats(hours=24)
         
         return jsonify({
             'status': 'success',
@@ -137,9 +224,9 @@ def get_analytics():
 def get_dashboard_data():
     """Get comprehensive dashboard data"""
     try:
-        from conversation_logger import conversation_logger
+        from conversation_logger import get_conversation_logger
         
-        dashboard_data = conversation_logger.get_analytics_dashboard_data()
+        dashboard_data = get_conversation_logger().get_analytics_dashboard_data()
         
         return jsonify({
             'status': 'success',
@@ -156,6 +243,12 @@ def get_dashboard_data():
         }), 500
 
 
-if __name__ == '__main__':
+def run_development_server():
+    """Serve the app with Flask's built-in server"""
     port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Development server only; production runs under Gunicorn (see dockerfile)
+    debug = os.getenv('FLASK_DEBUG', '0') == '1'
+    app.run(host='0.0.0.0', port=port, debug=debug)
+
+if __name__ == '__main__':
+    run_development_server()
@@ -1,59 +1,101 @@
 # basic_cuny_scraper.py
-import re, time, json, hashlib, urllib.parse, urllib.robotparser as rp
-import requests
-from bs4 import BeautifulSoup
-
-WHITELIST = (
-    r".*\.cuny\.edu$",
-    r".*\.baruch\.cuny\.edu$",
-    r".*\.hunter\.cuny\.edu$",
-    r".*\.citytech\.cuny\.edu$",
-    r".*\.ccny\.cuny\.edu$",
-)
+import time, hashlib, urllib.parse, urllib.robotparser as rp
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+import requests_cache
+import lxml.html
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Every college site lives under cuny.edu (baruch, hunter, citytech, ccny, ...)
+WHITELIST_DOMAIN = "cuny.edu"
+_WHITELIST_SUFFIX = "." + WHITELIST_DOMAIN
 
 HEADERS = {
     "User-Agent": "CUNYAdmissionsBot/0.1 (+https://example.org/contact)"
 }
 TIMEOUT = 15
-SLEEP_BETWEEN = 1.0  # seconds (be polite)
+SLEEP_BETWEEN = 1.0  # seconds between requests to the same host (be polite)
+MAX_WORKERS = 8  # distinct hosts scraped concurrently
+CACHE_NAME = "basic_scraper_cache"  # SQLite file backing the HTTP cache
+CACHE_EXPIRE_SECONDS = 24 * 60 * 60
+ROBOTS_TTL_SECONDS = 60 * 60
+_NOISE_TAGS = ("script", "style", "noscript", "header", "footer", "nav")
+# The html handed to extract() is already decoded, so re-encoded bytes are read
+# as UTF-8 whatever an XHTML page's <?xml encoding=...?> declaration says
+_UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# Persistent HTTP cache: repeated runs read pages from disk instead of the network
+_SESSION = requests_cache.CachedSession(
+    CACHE_NAME, backend="sqlite", expire_after=CACHE_EXPIRE_SECONDS
+)
+# Keep-alive pool per host so cache misses reuse TCP/TLS connections
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                       max_retries=Retry(total=3, backoff_factor=0.5))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.headers.update(HEADERS)
+# netloc -> (RobotFileParser, fetched_at)
+_ROBOTS_CACHE = {}
+
+def _robots_parser(parsed) -> rp.RobotFileParser:
+    """Return the robots.txt parser for a host, re-reading it at most once per TTL."""
+    cached = _ROBOTS_CACHE.get(parsed.netloc)
+    if cached and time.time() - cached[1] < ROBOTS_TTL_SECONDS:
+        return cached[0]
+    rparser = rp.RobotFileParser()
+    rparser.set_url(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+    rparser.read()
+    _ROBOTS_CACHE[parsed.netloc] = (rparser, time.time())
+    return rparser
 
 def allowed_by_robots(url: str) -> bool:
     parsed = urllib.parse.urlparse(url)
-    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-    rparser = rp.RobotFileParser()
     try:
-        rparser.set_url(robots_url)
-        rparser.read()
-        return rparser.can_fetch(HEADERS["User-Agent"], url)
+        return _robots_parser(parsed).can_fetch(HEADERS["User-Agent"], url)
     except Exception:
         # If robots fails to load, default to disallow to be safe
         return False
 
 def whitelisted(url: str) -> bool:
     host = urllib.parse.urlparse(url).netloc.lower()
-    return any(re.fullmatch(pat, host) for pat in WHITELIST)
+    return host.endswith(_WHITELIST_SUFFIX) or host == WHITELIST_DOMAIN
 
 def fetch(url: str) -> str:
-    resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+    resp = _SESSION.get(url, timeout=TIMEOUT)
     resp.raise_for_status()
     # basic content-type guard
     if "text/html" not in resp.headers.get("Content-Type", ""):
         raise ValueError("Not an HTML page")
     return resp.text
 
+def _parse_document(html: str):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"), parser=_UTF8_PARSER)
+
 def extract(html: str, base_url: str):
-    soup = BeautifulSoup(html, "html.parser")
+    # One lxml parse, no BeautifulSoup tree: noise subtrees are dropped in C and
+    # text and links come from a single walk of what remains
+    try:
+        root = _parse_document(html)
+    except etree.ParserError:
+        # Empty or whitespace-only body: nothing to extract
+        return "", "", []
     # Title
-    title = (soup.title.string.strip() if soup.title and soup.title.string else "")
+    title = (root.findtext(".//title") or "").strip()
     # Remove script/style/nav/footer for cleaner text
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
-        tag.decompose()
+    etree.strip_elements(root, etree.Comment, *_NOISE_TAGS, with_tail=False)
     # Get visible text
-    text = " ".join(s.strip() for s in soup.stripped_strings)
+    text = " ".join(chunk.strip() for chunk in root.itertext() if chunk.strip())
     # Keep on-site links you might crawl later
     links = []
-    for a in soup.find_all("a", href=True):
-        href = urllib.parse.urljoin(base_url, a["href"])
+    for href in root.xpath("//a/@href"):
+        href = urllib.parse.urljoin(base_url, href)
         if href.startswith("mailto:") or href.startswith("tel:"):
             continue
         if whitelisted(href):
@@ -63,7 +105,12 @@ def extract(html: str, base_url: str):
     return title, text, links
 
 def snapshot_record(url: str, title: str, text: str, links: list):
-    h = hashlib.sha256((url + text[:2000]).encode("utf-8")).hexdigest()[:12]
+    # Non-cryptographic dedupe key: BLAKE2b with a 6-byte digest gives the same
+    # 12 hex chars as before, and update() avoids building url + text[:2000]
+    hasher = hashlib.blake2b(digest_size=6)
+    hasher.update(url.encode("utf-8"))
+    hasher.update(text[:2000].encode("utf-8"))
+    h = hasher.hexdigest()
     return {
         "url": url,
         "title": title,
@@ -82,6 +129,36 @@ def scrape_one(url: str):
     title, text, links = extract(html, url)
     return snapshot_record(url, title, text, links)
 
+def scrape_host(urls: list):
+    """Scrape URLs that share a host one after another, sleeping between requests."""
+    outcomes = []
+    for i, url in enumerate(urls):
+        if i:
+            time.sleep(SLEEP_BETWEEN)
+        try:
+            outcomes.append((url, scrape_one(url), None))
+        except Exception as e:
+            outcomes.append((url, None, e))
+    return outcomes
+
+def scrape_many(urls: list) -> dict:
+    """Scrape URLs concurrently across hosts while staying serial per host.
+
+    Returns a dict mapping each URL to a ``(record, error)`` pair.
+    """
+    by_host = defaultdict(list)
+    for url in urls:
+        by_host[urllib.parse.urlparse(url).netloc.lower()].append(url)
+
+    outcomes = {}
+    if not by_host:
+        return outcomes
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(by_host))) as pool:
+        for batch in pool.map(scrape_host, by_host.values()):
+            for url, rec, err in batch:
+                outcomes[url] = (rec, err)
+    return outcomes
+
 if __name__ == "__main__":
     print("🚀 Starting CUNY scraper...")
     
@@ -92,19 +169,20 @@ if __name__ == "__main__":
         "https://hunter.cuny.edu/admissions/undergraduate/first-year-applicants/"
     ]
 
+    print(f"🔍 Scraping {len(test_urls)} URLs...")
+    outcomes = scrape_many(test_urls)
+
     results = []
     for u in test_urls:
-        try:
-            print(f"🔍 Scraping: {u}")
-            rec = scrape_one(u)
+        rec, err = outcomes[u]
+        if err is None:
             results.append(rec)
             print(f"✅ Successfully scraped: {rec['title'][:50]}...")
-            time.sleep(SLEEP_BETWEEN)
-        except Exception as e:
-            print(f"❌ Skipped {u}: {e}")
+        else:
+            print(f"❌ Skipped {u}: {err}")
 
     out_path = "cuny_scrape_results.json"
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    with open(out_path, "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     print(f"💾 Saved {len(results)} records to {out_path}")
     print("🎉 Scraping complete!")
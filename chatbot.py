@@ -1,15 +1,119 @@
-import openai
 import os
 import json
 import logging
+import threading
 import time
-from typing import List, Dict, Any
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Iterator, Optional
+import numpy as np
+from embeddings import create_embedder, embedding_backend
+from keyword_matcher import KeywordMatcher
 from knowledge_base import CUNYKnowledgeBase
+from response_cache import EXACT, ResponseCache
+from single_flight import SingleFlight
 from web_Scraper import get_cuny_answer_for_chatbot
-from conversation_logger import conversation_logger
 
 logger = logging.getLogger(__name__)
 
+# Runs live searches in the background so the knowledge base lookup overlaps them
+_live_search_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="live-search")
+# Runs the knowledge base + OpenAI answer speculatively alongside the live search
+_completion_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="kb-completion")
+# Live search gets this long on its own before a knowledge base answer is generated
+# to race it, so quick live answers don't pay for a second, discarded completion
+KB_SPECULATION_DELAY_SECONDS = 1.0
+# Once the knowledge base answer is ready, how much longer live search (which has
+# fresher data) may take before the knowledge base answer is returned instead
+LIVE_SEARCH_GRACE_SECONDS = 2.0
+# A streamed answer waits this long for live search, then streams the knowledge base answer
+STREAM_LIVE_SEARCH_WAIT_SECONDS = KB_SPECULATION_DELAY_SECONDS + LIVE_SEARCH_GRACE_SECONDS
+
+# How long a cached answer stays valid, by intent: deadlines move, contact details rarely do
+DEFAULT_CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_TTL_BY_INTENT = {
+    'application_deadlines': 60 * 60,
+    'financial_aid': 6 * 60 * 60,
+    'contact_information': 7 * 24 * 60 * 60,
+}
+# Sub-intents about the asker's own application are never served from or stored in the cache
+NO_CACHE_SUB_INTENTS = frozenset({'application_tracking', 'document_submission'})
+
+HISTORY_TOKEN_BUDGET = 2000  # estimated prompt tokens spent on prior messages
+MAX_HISTORY_CONTENT_CHARS = 4000  # per history message
+MAX_HISTORY_MESSAGES = 50  # history accepted from a client per request
+
+KB_CONTEXT_PREFIX = "Relevant information from CUNY knowledge base:\n"
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting: ~4 characters per token plus per-message overhead"""
+    return len(text) // 4 + 4
+
+_FALLBACK_RESPONSES = (
+    "I'm here to help you with CUNY information! Could you please rephrase your question?",
+    "I'd be happy to help you learn more about CUNY. What specific information are you looking for?",
+    "Let me help you find the information you need about CUNY. Could you tell me more about what you're interested in?",
+    "I'm your CUNY assistant! I can help with admissions, tuition, campus life, and more. What would you like to know?",
+    "Welcome to CUNY! I'm here to answer your questions about our colleges and programs. What can I help you with today?"
+)
+
+# Keyword rules for classifying a message, as ordered (label, keywords) pairs: the first
+# rule with a keyword occurring in the lowercased message wins. Adding a label is a data change.
+INTENT_RULES = (
+    ('admission_requirements', frozenset({'admission', 'apply', 'application', 'requirement'})),
+    ('financial_aid', frozenset({'tuition', 'cost', 'fee', 'price', 'financial'})),
+    ('academic_programs', frozenset({'program', 'major', 'degree', 'course'})),
+    ('campus_life', frozenset({'campus', 'tour', 'visit', 'location'})),
+    ('application_deadlines', frozenset({'deadline', 'date', 'when'})),
+    ('contact_information', frozenset({'contact', 'phone', 'email', 'office'})),
+)
+SUB_INTENT_RULES = (
+    ('deadlines', frozenset({'deadline', 'date', 'when'})),
+    ('document_submission', frozenset({'document', 'transcript', 'upload'})),
+    ('application_tracking', frozenset({'status', 'track', 'check'})),
+    ('transfer_credits', frozenset({'transfer', 'credit'})),
+    ('international_students', frozenset({'international', 'visa'})),
+)
+AUDIENCE_RULES = (
+    ('current_student', frozenset({'current', 'enrolled', 'student'})),
+    ('applicant', frozenset({'apply', 'application', 'admission'})),
+)
+FALLBACK_TOPIC_RULES = (
+    ('admissions', frozenset({'admission', 'apply', 'application'})),
+    ('tuition', frozenset({'tuition', 'cost', 'fee', 'price'})),
+    ('scholarships', frozenset({'scholarship', 'financial aid', 'money'})),
+    ('campus_visit', frozenset({'campus', 'tour', 'visit'})),
+)
+
+# All rule lists are matched together in a single scan of the message
+_CLASSIFIER = KeywordMatcher({
+    'intent': INTENT_RULES,
+    'sub_intent': SUB_INTENT_RULES,
+    'audience': AUDIENCE_RULES,
+    'fallback_topic': FALLBACK_TOPIC_RULES,
+}, defaults={
+    'intent': 'general_inquiry',
+    'sub_intent': 'general',
+    'audience': 'prospect',
+    'fallback_topic': None,
+})
+
+_FALLBACK_BY_TOPIC = {
+    'admissions': "I can help you with CUNY admissions! For the most current application requirements and deadlines, I recommend visiting the specific college's website or contacting their admissions office directly. Would you like to know about general admission requirements?",
+    'tuition': "CUNY offers affordable education! Tuition varies by residency status and program level. NY residents typically pay around $3,465 per semester for undergraduate programs. Would you like more specific information about tuition and fees?",
+    'scholarships': "CUNY offers many scholarship and financial aid opportunities! We have merit-based scholarships, need-based grants, and work-study programs. Have you completed the FAFSA? That's the first step for most financial aid.",
+    'campus_visit': "I'd love to help you plan a campus visit! Most CUNY colleges offer both in-person and virtual tours. Would you like information about scheduling a tour or taking a virtual campus tour?",
+}
+
+_QUICK_RESPONSES = {
+    "admissions": "CUNY has rolling admissions with priority deadlines. You'll need transcripts, personal statement, and letters of recommendation. Application fee is $65. Would you like specific requirements for your program?",
+    "tuition": "CUNY tuition is very affordable! NY residents pay about $3,465 per semester for undergraduate programs. Non-residents pay $620 per credit. Plus there are many scholarship opportunities!",
+    "scholarships": "CUNY offers excellent scholarships! We have merit-based awards up to $6,500/year, Presidential Scholarships for full tuition, and need-based grants. Have you completed your FAFSA?",
+    "campus_life": "CUNY campuses offer vibrant student life! We have 200+ clubs, NCAA sports, cultural events, and leadership programs. Housing options include on-campus and off-campus arrangements. What interests you most?",
+    "majors": "CUNY offers 100+ majors across all campuses! Popular programs include Business, Computer Science, Psychology, Engineering, and Education. What field interests you? I can help you find the right program!"
+}
+_DEFAULT_QUICK_RESPONSE = "I'm here to help! What would you like to know about CUNY?"
+
 class CUNYChatbot:
     """AI-powered chatbot for CUNY enrollment and information"""
     
@@ -19,7 +123,9 @@ class CUNYChatbot:
         api_key = os.getenv('OPENAI_API_KEY')
         if api_key and api_key != 'your_openai_api_key_here':
             try:
-                self.openai_client = openai.OpenAI(api_key=api_key)
+                # Imported here so the OpenAI SDK and httpx only load when they'll be used
+                from openai_client import get_openai_client
+                self.openai_client = get_openai_client(api_key)
                 self.has_openai = True
             except Exception as e:
                 logger.warning(f"Failed to initialize OpenAI client: {e}")
@@ -28,6 +134,14 @@ class CUNYChatbot:
             self.has_openai = False
             self.openai_client = None
         
+        # Exact-match + semantic cache of answers. The semantic tier is opt-in
+        # (EMBEDDING_BACKEND) and its embedder is only built on the first lookup
+        self.embedder = None
+        self._embedder_lock = threading.Lock()
+        self.response_cache = ResponseCache(embed_fn=self._embed_query if embedding_backend() else None)
+        # Identical prompts that arrive while one is already in flight share its completion
+        self._completions_in_flight = SingleFlight()
+        
         # System prompt that defines the chatbot's role and capabilities
         self.system_prompt = """You are CUNY (City University of New York) AI Assistant, a helpful and knowledgeable enrollment advisor. Your role is to provide accurate, helpful, and personalized information to prospective students about CUNY colleges.
 
@@ -50,6 +164,8 @@ Important guidelines:
 - Mention relevant deadlines and important dates when appropriate
 
 Remember: You're helping students make one of the most important decisions of their lives - be supportive and informative!"""
+        # Built once: the same message object heads every OpenAI request
+        self._system_message = {"role": "system", "content": self.system_prompt}
 
     def get_response(self, user_message: str, conversation_history: List[Dict[str, str]] = None) -> str:
         """Generate a response to user message using live search + knowledge base"""
@@ -57,117 +173,278 @@ Remember: You're helping students make one of the most important decisions of th
         response_method = "unknown"
         data_sources = []
         response = ""
+        labels = None
+        query_embedding = None
         
         try:
-            # Try live search first for current CUNY information
-            live_result = get_cuny_answer_for_chatbot(user_message, use_live_search=True)
+            # Lowercase once; every keyword classifier reads this copy
+            labels = self._classify(user_message.lower())
+            # Embed the message once; the cache lookup, cache insert and the
+            # conversation log all reuse this vector
+            query_embedding = self.response_cache.embed(user_message)
+            
+            # Serve repeated and near-duplicate questions straight from the cache,
+            # except for intents whose answers are personal to the asker
+            cache_context = self._cache_context(conversation_history)
+            use_cache = labels['sub_intent'] not in NO_CACHE_SUB_INTENTS
+            cached = self.response_cache.lookup(user_message, cache_context, query_embedding) if use_cache else None
+            if cached is not None:
+                (response, data_sources), tier = cached
+                response_time_ms = int((time.time() - start_time) * 1000)
+                self._log_conversation(
+                    user_message, response, data_sources,
+                    "cache" if tier == EXACT else "semantic_cache", response_time_ms, labels, query_embedding
+                )
+                return response
+            
+            # Race live search (current CUNY information) against a knowledge base
+            # answer, so a slow live search no longer adds its latency on top. The
+            # knowledge base answer is only started if live search isn't done soon;
+            # once started it runs to completion, even if live search then wins
+            live_future = _live_search_executor.submit(
+                get_cuny_answer_for_chatbot, user_message, use_live_search=True
+            )
+            kb_future = None
+            if not wait((live_future,), timeout=KB_SPECULATION_DELAY_SECONDS).done:
+                kb_future = self._start_kb_answer(user_message, conversation_history)
             
-            if live_result["success"]:
+            live_result = self._await_live_result(live_future, kb_future)
+            
+            if live_result and live_result["success"]:
                 logger.info(f"Live search successful for: {user_message}")
                 response = live_result["answer"]
                 response_method = "live_search"
                 data_sources = [source.get("url", "") for source in live_result.get("sources", [])]
             else:
                 # Fallback to static knowledge base
-                logger.info(f"Live search failed, using static knowledge base for: {user_message}")
-                kb_results = self.knowledge_base.search(user_message)
+                logger.info(f"Live search failed or too slow, using static knowledge base for: {user_message}")
+                if use_cache and not live_future.done():
+                    # Live search is still working; keep its answer for the next asker
+                    self._cache_late_live_answer(live_future, user_message, cache_context, labels, query_embedding)
                 
-                # If OpenAI is available, try to use it
-                if self.has_openai and self.openai_client:
-                    # Prepare context from knowledge base
-                    context = self._prepare_context(kb_results)
-                    
-                    # Prepare conversation history
-                    messages = self._prepare_messages(user_message, conversation_history, context)
-                    
-                    # Generate response using OpenAI
-                    response = self._generate_openai_response(messages)
+                kb_future = kb_future or self._start_kb_answer(user_message, conversation_history)
+                if kb_future:
+                    response = kb_future.result()
                     response_method = "static_kb"
                 else:
                     # Use fallback response if OpenAI is not available
-                    response = self._get_fallback_response(user_message)
+                    response = self._get_fallback_response(user_message, labels)
                     response_method = "fallback"
             
+            # Only cache generated answers, not canned fallbacks or error text
+            if use_cache and response_method in ("live_search", "static_kb"):
+                self._cache_answer(user_message, response, data_sources, cache_context, labels, query_embedding)
+            
             # Log the conversation
             response_time_ms = int((time.time() - start_time) * 1000)
             self._log_conversation(
-                user_message, response, data_sources, response_method, response_time_ms
+                user_message, response, data_sources, response_method, response_time_ms, labels, query_embedding
             )
             
             return response
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            response = self._get_fallback_response(user_message)
+            response = self._get_fallback_response(user_message, labels)
             response_method = "fallback"
             
             # Log the error conversation
             response_time_ms = int((time.time() - start_time) * 1000)
             self._log_conversation(
-                user_message, response, [], response_method, response_time_ms
+                user_message, response, [], response_method, response_time_ms, labels, query_embedding
             )
             
             return response
     
-    def _prepare_context(self, kb_results: List[Dict[str, Any]]) -> str:
-        """Prepare context from knowledge base search results"""
-        if not kb_results:
-            return "No specific information found in knowledge base."
+    def get_response_stream(self, user_message: str, conversation_history: List[Dict[str, str]] = None) -> Iterator[str]:
+        """Like get_response, but yield the response in pieces as it is generated
+        
+        Cached and live search answers arrive whole and are yielded at once; knowledge
+        base answers are streamed from OpenAI token by token. The assembled response is
+        cached and logged when the stream ends.
+        """
+        start_time = time.time()
+        response_method = "unknown"
+        data_sources = []
+        chunks = []
+        labels = None
+        query_embedding = None
         
-        context_parts = []
-        for result in kb_results:
-            category = result['category']
-            data = result['data']
+        try:
+            labels = self._classify(user_message.lower())
+            query_embedding = self.response_cache.embed(user_message)
+            
+            cache_context = self._cache_context(conversation_history)
+            use_cache = labels['sub_intent'] not in NO_CACHE_SUB_INTENTS
+            cached = self.response_cache.lookup(user_message, cache_context, query_embedding) if use_cache else None
+            if cached is not None:
+                (response, data_sources), tier = cached
+                response_method = "cache" if tier == EXACT else "semantic_cache"
+                chunks.append(response)
+                yield response
+                return
             
-            # Format the data for context
-            if isinstance(data, dict):
-                formatted_data = self._format_dict_for_context(data)
-            elif isinstance(data, list):
-                formatted_data = ", ".join(str(item) for item in data)
+            # Live search answers are complete documents with citations, so only the
+            # knowledge base answer is worth streaming; it starts once live search
+            # has had STREAM_LIVE_SEARCH_WAIT_SECONDS, so the first token is not held
+            # back by a slow scrape
+            live_future = _live_search_executor.submit(
+                get_cuny_answer_for_chatbot, user_message, use_live_search=True
+            )
+            can_stream_kb = self.has_openai and self.openai_client
+            live_result = self._await_live_result(
+                live_future, timeout=STREAM_LIVE_SEARCH_WAIT_SECONDS if can_stream_kb else None
+            )
+            
+            if live_result and live_result["success"]:
+                response_method = "live_search"
+                data_sources = [source.get("url", "") for source in live_result.get("sources", [])]
+                chunks.append(live_result["answer"])
+                yield live_result["answer"]
+            elif can_stream_kb:
+                if use_cache and not live_future.done():
+                    self._cache_late_live_answer(live_future, user_message, cache_context, labels, query_embedding)
+                context = self._prepare_context(self.knowledge_base.search(user_message))
+                messages = self._prepare_messages(user_message, conversation_history, context)
+                response_method = "static_kb"
+                for piece in self._stream_openai_response(messages):
+                    chunks.append(piece)
+                    yield piece
             else:
-                formatted_data = str(data)
+                response_method = "fallback"
+                chunks.append(self._get_fallback_response(user_message, labels))
+                yield chunks[-1]
+            
+            # Cache the assembled response, never individual chunks
+            if use_cache and response_method in ("live_search", "static_kb"):
+                self._cache_answer(user_message, "".join(chunks), data_sources, cache_context, labels, query_embedding)
             
-            context_parts.append(f"{category.replace('_', ' ').title()}: {formatted_data}")
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            # Only fall back if nothing has been sent yet; a partial answer stays as is
+            if not chunks:
+                response_method = "fallback"
+                chunks.append(self._get_fallback_response(user_message, labels))
+                yield chunks[-1]
         
-        return "\n\n".join(context_parts)
+        finally:
+            # Also runs when the client disconnects mid-stream
+            response_time_ms = int((time.time() - start_time) * 1000)
+            self._log_conversation(
+                user_message, "".join(chunks), data_sources, response_method, response_time_ms, labels, query_embedding
+            )
     
-    def _format_dict_for_context(self, data: Dict[str, Any], indent: int = 0) -> str:
-        """Format dictionary data for context"""
-        parts = []
-        for key, value in data.items():
-            if isinstance(value, dict):
-                formatted_value = self._format_dict_for_context(value, indent + 1)
-                parts.append(f"{key.replace('_', ' ').title()}: {formatted_value}")
-            elif isinstance(value, list):
-                formatted_value = ", ".join(str(item) for item in value)
-                parts.append(f"{key.replace('_', ' ').title()}: {formatted_value}")
-            else:
-                parts.append(f"{key.replace('_', ' ').title()}: {value}")
+    def _await_live_result(self, live_future: Future, kb_future: Optional[Future] = None,
+                           timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for live search, giving up LIVE_SEARCH_GRACE_SECONDS after the KB answer is ready
         
-        return "; ".join(parts)
+        Without a KB answer to race, wait at most timeout seconds (None: until done).
+        Returns None when live search lost the race or failed; the caller then uses
+        the KB answer.
+        """
+        if kb_future is not None:
+            done, _ = wait((live_future, kb_future), return_when=FIRST_COMPLETED)
+            if live_future not in done:
+                # A failed KB answer is no reason to stop waiting for live search
+                grace = LIVE_SEARCH_GRACE_SECONDS if kb_future.exception() is None else None
+                done, _ = wait((live_future,), timeout=grace)
+        else:
+            done, _ = wait((live_future,), timeout=timeout)
+        if live_future not in done:
+            return None
+        try:
+            return live_future.result()
+        except Exception as e:
+            logger.warning(f"Live search failed: {e}")
+            return None
+    
+    def _start_kb_answer(self, user_message: str, conversation_history: List[Dict[str, str]]) -> Optional[Future]:
+        """Start generating the knowledge base answer in the background, if OpenAI is available"""
+        if not (self.has_openai and self.openai_client):
+            return None
+        context = self._prepare_context(self.knowledge_base.search(user_message))
+        messages = self._prepare_messages(user_message, conversation_history, context)
+        return _completion_executor.submit(self._generate_openai_response, messages)
+    
+    def _cache_answer(self, user_message: str, response: str, data_sources: List[str], cache_context: str,
+                      labels: Dict[str, str], query_embedding: Optional[np.ndarray]):
+        """Cache a generated answer for its intent's TTL; error text is never cached"""
+        if response.startswith("Error generating answer"):
+            return
+        ttl = CACHE_TTL_BY_INTENT.get(labels['intent'], DEFAULT_CACHE_TTL_SECONDS)
+        self.response_cache.put(user_message, (response, data_sources), cache_context,
+                                ttl=ttl, embedding=query_embedding)
+    
+    def _cache_late_live_answer(self, live_future: Future, user_message: str, cache_context: str,
+                                labels: Dict[str, str], query_embedding: Optional[np.ndarray]):
+        """Cache live search's answer once it arrives, after the KB answer was already returned"""
+        def store(future: Future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            if result and result["success"]:
+                data_sources = [source.get("url", "") for source in result.get("sources", [])]
+                self._cache_answer(user_message, result["answer"], data_sources, cache_context,
+                                   labels, query_embedding)
+        live_future.add_done_callback(store)
+    
+    def _cache_context(self, conversation_history: List[Dict[str, str]]) -> str:
+        """Key cached answers on the last assistant turn so follow-ups aren't conflated"""
+        # The knowledge base version is part of the key, so a reload retires old answers
+        for msg in reversed(conversation_history or []):
+            if msg.get('role') == 'assistant':
+                return f"{self.knowledge_base.version}:{msg.get('content', '')}"
+        return f"{self.knowledge_base.version}:"
+    
+    def _prepare_context(self, kb_results: List[Dict[str, Any]]) -> str:
+        """Prepare context from the knowledge base search results"""
+        # search() already returns only the top 5 keyword-matched categories; order
+        # them by category so the same results always produce byte-identical context
+        if not kb_results:
+            return "No specific information found in knowledge base."
+        
+        # Each category's context string is pre-rendered by the knowledge base
+        return "\n\n".join(
+            self.knowledge_base.get_context(r['category'])
+            for r in sorted(kb_results, key=lambda r: r['category'])
+        )
     
     def _prepare_messages(self, user_message: str, conversation_history: List[Dict[str, str]], context: str) -> List[Dict[str, str]]:
         """Prepare messages for OpenAI API"""
+        # The static system prompt goes first, unchanged, so OpenAI's prompt cache
+        # can reuse it; the per-request knowledge base context follows separately
         messages = [
-            {"role": "system", "content": self.system_prompt + f"\n\nRelevant information from CUNY knowledge base:\n{context}"}
+            self._system_message,
+            {"role": "system", "content": KB_CONTEXT_PREFIX + context}
         ]
         
-        # Add conversation history
-        if conversation_history:
-            for msg in conversation_history[-6:]:  # Keep last 6 messages for context
-                if msg.get('role') == 'user':
-                    messages.append({"role": "user", "content": msg.get('content', '')})
-                elif msg.get('role') == 'assistant':
-                    messages.append({"role": "assistant", "content": msg.get('content', '')})
+        # Add conversation history: the newest user/assistant turns that fit the token
+        # budget, each truncated so a pasted wall of text can't blow up the prompt
+        messages.extend(self._history_window(conversation_history))
         
         # Add current user message
         messages.append({"role": "user", "content": user_message})
         
         return messages
     
+    def _history_window(self, conversation_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Return the most recent history messages whose estimated tokens fit HISTORY_TOKEN_BUDGET"""
+        window = []
+        budget = HISTORY_TOKEN_BUDGET
+        for msg in reversed(conversation_history or []):
+            if msg.get('role') not in ('user', 'assistant'):
+                continue
+            content = str(msg.get('content', ''))[:MAX_HISTORY_CONTENT_CHARS]
+            budget -= estimate_tokens(content)
+            if budget < 0:
+                break
+            window.append({"role": msg['role'], "content": content})
+        window.reverse()
+        return window
+    
     def _generate_openai_response(self, messages: List[Dict[str, str]]) -> str:
         """Generate response using OpenAI API"""
-        try:
+        def create_completion() -> str:
             response = self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",  # Latest and most capable model
                 messages=messages,
@@ -175,120 +452,85 @@ Remember: You're helping students make one of the most important decisions of th
                 temperature=0.7,
                 top_p=0.9
             )
-            
             return response.choices[0].message.content.strip()
+        
+        try:
+            key = json.dumps(messages, sort_keys=True)
+            return self._completions_in_flight.do(key, create_completion)
             
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
             raise e
     
-    def _get_fallback_response(self, user_message: str) -> str:
-        """Provide fallback response when AI generation fails"""
-        fallback_responses = [
-            "I'm here to help you with CUNY information! Could you please rephrase your question?",
-            "I'd be happy to help you learn more about CUNY. What specific information are you looking for?",
-            "Let me help you find the information you need about CUNY. Could you tell me more about what you're interested in?",
-            "I'm your CUNY assistant! I can help with admissions, tuition, campus life, and more. What would you like to know?",
-            "Welcome to CUNY! I'm here to answer your questions about our colleges and programs. What can I help you with today?"
-        ]
-        
-        # Simple keyword-based fallback
-        user_lower = user_message.lower()
-        
-        if any(word in user_lower for word in ['admission', 'apply', 'application']):
-            return "I can help you with CUNY admissions! For the most current application requirements and deadlines, I recommend visiting the specific college's website or contacting their admissions office directly. Would you like to know about general admission requirements?"
-        
-        elif any(word in user_lower for word in ['tuition', 'cost', 'fee', 'price']):
-            return "CUNY offers affordable education! Tuition varies by residency status and program level. NY residents typically pay around $3,465 per semester for undergraduate programs. Would you like more specific information about tuition and fees?"
-        
-        elif any(word in user_lower for word in ['scholarship', 'financial aid', 'money']):
-            return "CUNY offers many scholarship and financial aid opportunities! We have merit-based scholarships, need-based grants, and work-study programs. Have you completed the FAFSA? That's the first step for most financial aid."
+    def _stream_openai_response(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Generate response using OpenAI API, yielding text as it arrives"""
+        stream = self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            max_tokens=1000,
+            temperature=0.7,
+            top_p=0.9,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _get_fallback_response(self, user_message: str, labels: Dict[str, str] = None) -> str:
+        """Provide fallback response when AI generation fails
         
-        elif any(word in user_lower for word in ['campus', 'tour', 'visit']):
-            return "I'd love to help you plan a campus visit! Most CUNY colleges offer both in-person and virtual tours. Would you like information about scheduling a tour or taking a virtual campus tour?"
+        labels is the classification get_response computed up front; the canned reply
+        is a dict lookup on its fallback topic, with no further keyword scanning.
+        """
+        if labels is None:
+            labels = self._classify(user_message.lower())
         
-        else:
-            return fallback_responses[hash(user_message) % len(fallback_responses)]
+        # crc32 is stable across processes (str hash is salted per process), so a
+        # given message gets the same generic reply from every worker
+        return (_FALLBACK_BY_TOPIC.get(labels['fallback_topic'])
+                or _FALLBACK_RESPONSES[zlib.crc32(user_message.encode("utf-8", "ignore")) % len(_FALLBACK_RESPONSES)])
     
     def get_quick_response(self, question_type: str) -> str:
         """Get quick response for common question types"""
-        quick_responses = {
-            "admissions": "CUNY has rolling admissions with priority deadlines. You'll need transcripts, personal statement, and letters of recommendation. Application fee is $65. Would you like specific requirements for your program?",
-            "tuition": "CUNY tuition is very affordable! NY residents pay about $3,465 per semester for undergraduate programs. Non-residents pay $620 per credit. Plus there are many scholarship opportunities!",
-            "scholarships": "CUNY offers excellent scholarships! We have merit-based awards up to $6,500/year, Presidential Scholarships for full tuition, and need-based grants. Have you completed your FAFSA?",
-            "campus_life": "CUNY campuses offer vibrant student life! We have 200+ clubs, NCAA sports, cultural events, and leadership programs. Housing options include on-campus and off-campus arrangements. What interests you most?",
-            "majors": "CUNY offers 100+ majors across all campuses! Popular programs include Business, Computer Science, Psychology, Engineering, and Education. What field interests you? I can help you find the right program!"
-        }
-        
-        return quick_responses.get(question_type, "I'm here to help! What would you like to know about CUNY?")
+        return _QUICK_RESPONSES.get(question_type, _DEFAULT_QUICK_RESPONSE)
     
     def _log_conversation(self, user_query: str, bot_response: str, data_sources: List[str], 
-                         response_method: str, response_time_ms: int):
+                         response_method: str, response_time_ms: int, labels: Dict[str, str] = None,
+                         query_embedding: Optional[np.ndarray] = None):
         """Log conversation to database for OAREDA analytics"""
         try:
             # Extract user intent from query (simple keyword matching)
-            user_intent = self._extract_user_intent(user_query)
-            user_sub_intent = self._extract_user_sub_intent(user_query)
-            user_audience = self._extract_user_audience(user_query)
+            labels = labels or self._classify(user_query.lower())
             
-            # Log the conversation
-            conversation_logger.log_conversation(
+            # Log the conversation; the logger (and SQLAlchemy) load on first use
+            from conversation_logger import get_conversation_logger
+            get_conversation_logger().log_conversation(
                 user_query=user_query,
                 bot_response=bot_response,
                 data_sources=data_sources,
                 response_method=response_method,
-                user_audience=user_audience,
-                user_intent=user_intent,
-                user_sub_intent=user_sub_intent,
-                response_time_ms=response_time_ms
+                user_audience=labels['audience'],
+                user_intent=labels['intent'],
+                user_sub_intent=labels['sub_intent'],
+                response_time_ms=response_time_ms,
+                query_embedding=query_embedding.tobytes() if query_embedding is not None else None
             )
             
         except Exception as e:
             logger.error(f"Failed to log conversation: {e}")
     
-    def _extract_user_intent(self, query: str) -> str:
-        """Extract user intent from query using keyword matching"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['admission', 'apply', 'application', 'requirement']):
-            return 'admission_requirements'
-        elif any(word in query_lower for word in ['tuition', 'cost', 'fee', 'price', 'financial']):
-            return 'financial_aid'
-        elif any(word in query_lower for word in ['program', 'major', 'degree', 'course']):
-            return 'academic_programs'
-        elif any(word in query_lower for word in ['campus', 'tour', 'visit', 'location']):
-            return 'campus_life'
-        elif any(word in query_lower for word in ['deadline', 'date', 'when']):
-            return 'application_deadlines'
-        elif any(word in query_lower for word in ['contact', 'phone', 'email', 'office']):
-            return 'contact_information'
-        else:
-            return 'general_inquiry'
-    
-    def _extract_user_sub_intent(self, query: str) -> str:
-        """Extract more specific sub-intent from query"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['deadline', 'date', 'when']):
-            return 'deadlines'
-        elif any(word in query_lower for word in ['document', 'transcript', 'upload']):
-            return 'document_submission'
-        elif any(word in query_lower for word in ['status', 'track', 'check']):
-            return 'application_tracking'
-        elif any(word in query_lower for word in ['transfer', 'credit']):
-            return 'transfer_credits'
-        elif any(word in query_lower for word in ['international', 'visa']):
-            return 'international_students'
-        else:
-            return 'general'
+    def _embed_query(self, text: str) -> np.ndarray:
+        """The response cache's embed_fn: creates the embedder on first use"""
+        if self.embedder is None:
+            with self._embedder_lock:
+                if self.embedder is None:
+                    self.embedder = create_embedder(self.openai_client if self.has_openai else None)
+                    if self.embedder is None:
+                        # Not available after all: stop trying, exact matching still works
+                        self.response_cache.embed_fn = None
+                        raise RuntimeError("no embedding backend available")
+        return self.embedder.embed_one(text)
     
-    def _extract_user_audience(self, query: str) -> str:
-        """Extract user audience type from query"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['current', 'enrolled', 'student']):
-            return 'current_student'
-        elif any(word in query_lower for word in ['apply', 'application', 'admission']):
-            return 'applicant'
-        else:
-            return 'prospect'
+    def _classify(self, query_lower: str) -> Dict[str, str]:
+        """Extract intent, sub-intent, audience and fallback topic from an already lowercased query"""
+        return _CLASSIFIER.classify(query_lower)
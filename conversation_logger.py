@@ -1,10 +1,18 @@
 import os
 import json
+import atexit
+import functools
 import logging
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Float, JSON
+from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Float, JSON, Index, LargeBinary, desc, func, insert, inspect, text, update
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 import uuid
 
@@ -14,12 +22,23 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+CONNECT_TIMEOUT_SECONDS = 2
+
+# Phrases that mark a generic, low-information response
+GENERIC_PHRASES = (
+    "I don't have specific information",
+    "Please check the website",
+    "Contact the office",
+    "I'm not sure about that"
+)
+_GENERIC_RE = re.compile("|".join(map(re.escape, GENERIC_PHRASES)), re.IGNORECASE)
+
 class Conversation(Base):
     """Conversation table matching the spreadsheet structure"""
     __tablename__ = 'conversations'
     
     # Primary key
-    conversation_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    conversation_id = Column(String(36), primary_key=True)  # generated by log_conversation
     
     # User information
     user_audience = Column(String(50))  # prospect, applicant, current_student
@@ -46,6 +65,12 @@ class Conversation(Base):
     response_time_ms = Column(Integer)  # Response generation time
     sources_count = Column(Integer, default=0)  # Number of sources used
     response_length = Column(Integer)  # Character count of response
+    query_embedding = Column(LargeBinary)  # float32 query vector, for clustering knowledge gaps offline
+    
+    # Every analytics query filters on a time window, then groups by intent or method
+    __table_args__ = (
+        Index('ix_conv_ts_intent_method', 'timestamp', 'user_intent', 'response_method'),
+    )
 
 class QueryAnalytics(Base):
     """Query pattern analytics table"""
@@ -60,7 +85,15 @@ class QueryAnalytics(Base):
     last_updated = Column(DateTime, default=datetime.utcnow)
 
 class ConversationLogger:
-    """Real-time conversation logging system for Bot 1"""
+    """Real-time conversation logging system for Bot 1
+    
+    Rows are queued by log_conversation and written in batches by a background
+    thread, so the database round trips stay off the request path.
+    """
+    
+    QUEUE_SIZE = 10_000      # pending rows before new ones are dropped
+    BATCH_SIZE = 200         # max rows written per transaction
+    BATCH_WAIT_SECONDS = 0.1 # how long to wait to fill a batch
     
     def __init__(self, database_url: str = None):
         """Initialize the conversation logger with database connection"""
@@ -69,22 +102,81 @@ class ConversationLogger:
             database_url = os.getenv('DATABASE_URL', 'postgresql://localhost/cuny_chatbot')
         
         try:
-            self.engine = create_engine(database_url)
-            self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            self.engine = create_engine(database_url, **self._engine_options(database_url))
+            # Sessions are used as `with self.SessionLocal.begin() as session:` so commit,
+            # rollback and returning the connection to the pool are automatic
+            self.SessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, bind=self.engine)
     
+            # Tables are created on first use (see _ensure_schema), so constructing
+            # the logger doesn't open a database connection
+    
+            logger.info("Conversation logger initialized successfully")
+    
+        except Exception as e:
+            logger.error(f"Failed to initialize conversation logger: {e}")
+            self.engine = None
+            self.SessionLocal = None
+        
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._write_lock = threading.Lock()
+        # Set once the schema exists; a failed attempt leaves it unset so the next use retries
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        if self.engine:
+            threading.Thread(target=self._drain, name="conversation-logger", daemon=True).start()
+            # Write whatever is still queued when the process exits
+            atexit.register(self.flush)
+    
+    def _ensure_schema(self) -> bool:
+        """Create tables, indexes and newer columns on first use, retrying until it succeeds"""
+        if self._schema_ready:
+            return True
+        # The drain thread and stats calls may get here at once; only one creates the schema
+        with self._schema_lock:
+            if self._schema_ready:
+                return True
             # Create tables if they don't exist - ignore if they already exist
             try:
                 Base.metadata.create_all(bind=self.engine)
+                # create_all skips tables that already exist, so add newer indexes explicitly
+                for index in Conversation.__table__.indexes:
+                    index.create(bind=self.engine, checkfirst=True)
+                self._add_missing_columns()
                 logger.info("Tables created successfully")
             except Exception as table_error:
                 logger.info(f"Tables already exist or creation failed: {table_error}")
+                return False
+            self._schema_ready = True
+            return True
     
-            logger.info("Conversation logger initialized successfully")
+    @staticmethod
+    def _engine_options(database_url: str) -> Dict[str, Any]:
+        """Connection pool settings sized for concurrent request and logging threads"""
+        url = make_url(database_url)
+        if url.get_backend_name() == 'sqlite':
+            return {}
+        options = {
+            'pool_size': 20,
+            'max_overflow': 40,
+            'pool_pre_ping': True,   # drop connections the server closed while idle
+            'pool_recycle': 1800,
+        }
+        if url.get_backend_name() == 'postgresql':
+            # Fail fast instead of hanging for the OS TCP timeout when the database is down
+            options['connect_args'] = {'connect_timeout': CONNECT_TIMEOUT_SECONDS}
+        return options
     
-        except Exception as e:
-            logger.error(f"Failed to initialize conversation logger: {e}")
-            self.engine = None
-            self.SessionLocal = None
+    def _add_missing_columns(self):
+        """Add columns introduced after the conversations table was first created"""
+        existing = {column['name'] for column in inspect(self.engine).get_columns(Conversation.__tablename__)}
+        with self.engine.begin() as connection:
+            for column in Conversation.__table__.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.execute(text(
+                        f"ALTER TABLE {Conversation.__tablename__} ADD COLUMN {column.name} {column_type}"
+                    ))
+                    logger.info(f"Added column {Conversation.__tablename__}.{column.name}")
     
     def log_conversation(self, 
                         user_query: str,
@@ -96,7 +188,8 @@ class ConversationLogger:
                         user_sub_intent: str = "unknown",
                         response_time_ms: int = 0,
                         session_id: str = None,
-                        user_satisfaction: int = None) -> str:
+                        user_satisfaction: int = None,
+                        query_embedding: bytes = None) -> str:
         """Log a conversation with all metadata"""
         
         if not self.engine:
@@ -112,8 +205,8 @@ class ConversationLogger:
                 user_query, bot_response, data_sources, response_method
             )
             
-            # Create conversation record
-            conversation = Conversation(
+            # Queue the conversation record; the background thread writes it
+            row = dict(
                 conversation_id=conversation_id,
                 user_audience=user_audience,
                 user_intent=user_intent,
@@ -124,28 +217,66 @@ class ConversationLogger:
                 response_method=response_method,
                 response_quality_score=quality_score,
                 user_satisfaction=user_satisfaction,
-                response_time_ms=response_time_ms,
+                timestamp=datetime.utcnow(),
                 session_id=session_id or str(uuid.uuid4()),
+                response_time_ms=response_time_ms,
                 sources_count=len(data_sources) if data_sources else 0,
-                response_length=len(bot_response)
+                response_length=len(bot_response),
+                query_embedding=query_embedding
             )
             
-            # Save to database
-            session = self.SessionLocal()
-            session.add(conversation)
-            session.commit()
-            session.close()
-            
-            # Update analytics
-            self._update_query_analytics(user_intent, response_method, response_time_ms)
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                logger.warning(f"Conversation log queue full, dropping conversation {conversation_id}")
+                return None
             
-            logger.info(f"Conversation logged: {conversation_id}")
             return conversation_id
             
         except Exception as e:
             logger.error(f"Failed to log conversation: {e}")
             return None
     
+    def flush(self):
+        """Write every queued conversation now (called at exit; handy in tests)"""
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            self._write_batch(batch)
+    
+    def _drain(self):
+        """Background loop: collect up to BATCH_SIZE rows or BATCH_WAIT_SECONDS, then write them"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.BATCH_WAIT_SECONDS
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+    
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        """Insert a batch of conversations and fold it into the analytics in one transaction"""
+        try:
+            self._ensure_schema()
+            with self._write_lock, self.SessionLocal.begin() as session:
+                # Core executemany: one compiled INSERT bound to every row, no ORM unit of work
+                session.execute(insert(Conversation.__table__), rows)
+                self._update_query_analytics(session, rows)
+            logger.info(f"Logged {len(rows)} conversations")
+        except Exception as e:
+            logger.error(f"Failed to log {len(rows)} conversations: {e}")
+    
     def _calculate_quality_score(self, 
                                 user_query: str, 
                                 bot_response: str, 
@@ -176,93 +307,82 @@ class ConversationLogger:
             score += 0.1  # Slightly penalize very long responses
         
         # Penalty for generic responses
-        generic_phrases = [
-            "I don't have specific information",
-            "Please check the website",
-            "Contact the office",
-            "I'm not sure about that"
-        ]
-        
-        if any(phrase.lower() in bot_response.lower() for phrase in generic_phrases):
+        if _GENERIC_RE.search(bot_response):
             score -= 0.2
         
         return max(0.0, min(1.0, score))  # Clamp between 0 and 1
     
-    def _update_query_analytics(self, query_type: str, response_method: str, response_time_ms: int):
-        """Update query analytics for pattern analysis"""
-        if not self.engine:
-            return
+    def _update_query_analytics(self, session, rows: List[Dict[str, Any]]):
+        """Update query analytics for pattern analysis with one batch of conversations"""
+        # Aggregate the batch per query type first, so each type is touched once
+        batch_stats = defaultdict(lambda: {'count': 0, 'total_time': 0, 'first_method': None})
+        for row in rows:
+            stats = batch_stats[row['user_intent']]
+            stats['count'] += 1
+            stats['total_time'] += row['response_time_ms'] or 0
+            if stats['first_method'] is None:
+                stats['first_method'] = row['response_method']
         
-        try:
-            session = self.SessionLocal()
-            
-            # Find existing analytics record
-            analytics = session.query(QueryAnalytics).filter(
-                QueryAnalytics.query_type == query_type
-            ).first()
-            
-            if analytics:
-                # Update existing record
-                analytics.frequency_count += 1
-                analytics.avg_response_time = (
-                    (analytics.avg_response_time * (analytics.frequency_count - 1) + response_time_ms) 
-                    / analytics.frequency_count
+        analytics = QueryAnalytics.__table__
+        now = datetime.utcnow()
+        new_rows = []
+        for query_type, stats in batch_stats.items():
+            # Fold the batch into the running mean in SQL; SET expressions read the old values
+            result = session.execute(
+                update(analytics).where(analytics.c.query_type == query_type).values(
+                    avg_response_time=(
+                        (analytics.c.avg_response_time * analytics.c.frequency_count + stats['total_time'])
+                        / (analytics.c.frequency_count + stats['count'])
+                    ),
+                    frequency_count=analytics.c.frequency_count + stats['count'],
+                    last_updated=now
                 )
-                analytics.last_updated = datetime.utcnow()
-            else:
+            )
+            if result.rowcount == 0:
                 # Create new record
-                analytics = QueryAnalytics(
+                new_rows.append(dict(
                     query_type=query_type,
-                    frequency_count=1,
-                    avg_response_time=response_time_ms,
-                    success_rate=1.0 if response_method != "fallback" else 0.0
-                )
-                session.add(analytics)
-            
-            session.commit()
-            session.close()
-            
-        except Exception as e:
-            logger.error(f"Failed to update query analytics: {e}")
+                    frequency_count=stats['count'],
+                    avg_response_time=stats['total_time'] / stats['count'],
+                    success_rate=1.0 if stats['first_method'] != "fallback" else 0.0,
+                    common_failure_patterns=None,
+                    last_updated=now
+                ))
+        
+        if new_rows:
+            session.execute(insert(analytics), new_rows)
     
     def get_conversation_stats(self, hours: int = 24) -> Dict[str, Any]:
         """Get conversation statistics for the last N hours"""
         if not self.engine:
             return {}
         
+        self._ensure_schema()
         try:
-            session = self.SessionLocal()
-            
-            # Calculate time threshold
-            time_threshold = datetime.utcnow() - timedelta(hours=hours)
-            
-            # Get basic stats
-            total_conversations = session.query(Conversation).filter(
-                Conversation.timestamp >= time_threshold
-            ).count()
-            
-            avg_quality = session.query(Conversation).filter(
-                Conversation.timestamp >= time_threshold
-            ).with_entities(Conversation.response_quality_score).all()
-            
-            avg_quality_score = sum([q[0] for q in avg_quality]) / len(avg_quality) if avg_quality else 0
-            
-            # Get top intents
-            top_intents = session.query(
-                Conversation.user_intent,
-                session.query(Conversation).filter(
-                    Conversation.user_intent == Conversation.user_intent,
+            with self.SessionLocal.begin() as session:
+                # Calculate time threshold
+                time_threshold = datetime.utcnow() - timedelta(hours=hours)
+                
+                # Get basic stats in one aggregate query
+                total_conversations, avg_quality_score = session.query(
+                    func.count(Conversation.conversation_id),
+                    func.avg(Conversation.response_quality_score)
+                ).filter(
                     Conversation.timestamp >= time_threshold
-                ).count().label('count')
-            ).filter(
-                Conversation.timestamp >= time_threshold
-            ).group_by(Conversation.user_intent).order_by('count DESC').limit(5).all()
-            
-            session.close()
+                ).one()
+                
+                # Get top intents
+                count = func.count(Conversation.conversation_id).label('count')
+                top_intents = session.query(
+                    Conversation.user_intent,
+                    count
+                ).filter(
+                    Conversation.timestamp >= time_threshold
+                ).group_by(Conversation.user_intent).order_by(desc(count)).limit(5).all()
             
             return {
                 'total_conversations': total_conversations,
-                'avg_quality_score': round(avg_quality_score, 2),
+                'avg_quality_score': round(float(avg_quality_score or 0), 2),
                 'top_intents': [{'intent': intent, 'count': count} for intent, count in top_intents],
                 'time_period_hours': hours
             }
@@ -276,91 +396,108 @@ class ConversationLogger:
         if not self.engine:
             return {}
         
+        self._ensure_schema()
         try:
-            session = self.SessionLocal()
-            
-            # Get all analytics
-            analytics = session.query(QueryAnalytics).all()
-            
-            # Get recent conversations (last 7 days)
-            week_ago = datetime.utcnow() - timedelta(days=7)
-            recent_conversations = session.query(Conversation).filter(
-                Conversation.timestamp >= week_ago
-            ).all()
-            
-            # Process data for dashboard
-            dashboard_data = {
-                'query_patterns': [
-                    {
-                        'query_type': a.query_type,
-                        'frequency': a.frequency_count,
-                        'success_rate': a.success_rate,
-                        'avg_response_time': a.avg_response_time
-                    } for a in analytics
-                ],
-                'recent_activity': {
-                    'total_conversations': len(recent_conversations),
-                    'avg_quality_score': sum([c.response_quality_score for c in recent_conversations]) / len(recent_conversations) if recent_conversations else 0,
-                    'response_methods': {}
-                },
-                'knowledge_gaps': self._identify_knowledge_gaps(recent_conversations)
-            }
+            with self.SessionLocal.begin() as session:
+                # Get all analytics
+                analytics = session.query(QueryAnalytics).all()
+                
+                # Aggregate recent conversations (last 7 days) in the database
+                week_ago = datetime.utcnow() - timedelta(days=7)
+                total_conversations, avg_quality_score = session.query(
+                    func.count(Conversation.conversation_id),
+                    func.avg(Conversation.response_quality_score)
+                ).filter(
+                    Conversation.timestamp >= week_ago
+                ).one()
+                
+                # Count response methods
+                response_methods = dict(session.query(
+                    Conversation.response_method,
+                    func.count(Conversation.conversation_id)
+                ).filter(
+                    Conversation.timestamp >= week_ago
+                ).group_by(Conversation.response_method).all())
+                
+                # Process data for dashboard
+                dashboard_data = {
+                    'query_patterns': [
+                        {
+                            'query_type': a.query_type,
+                            'frequency': a.frequency_count,
+                            'success_rate': a.success_rate,
+                            'avg_response_time': a.avg_response_time
+                        } for a in analytics
+                    ],
+                    'recent_activity': {
+                        'total_conversations': total_conversations,
+                        'avg_quality_score': float(avg_quality_score or 0),
+                        'response_methods': response_methods
+                    },
+                    'knowledge_gaps': self._identify_knowledge_gaps(session, week_ago)
+                }
             
-            # Count response methods
-            for conv in recent_conversations:
-                method = conv.response_method
-                if method in dashboard_data['recent_activity']['response_methods']:
-                    dashboard_data['recent_activity']['response_methods'][method] += 1
-                else:
-                    dashboard_data['recent_activity']['response_methods'][method] = 1
-            
-            session.close()
             return dashboard_data
             
         except Exception as e:
             logger.error(f"Failed to get analytics dashboard data: {e}")
             return {}
     
-    def _identify_knowledge_gaps(self, conversations: List[Conversation]) -> List[Dict[str, Any]]:
-        """Identify potential knowledge gaps based on conversation patterns"""
+    def _identify_knowledge_gaps(self, session, since: datetime) -> List[Dict[str, Any]]:
+        """Identify potential knowledge gaps based on conversation patterns since a point in time"""
         gaps = []
+        recent = Conversation.timestamp >= since
         
         # Find queries with low quality scores
-        low_quality = [c for c in conversations if c.response_quality_score < 0.3]
-        
-        if low_quality:
-            gaps.append({
-                'type': 'low_quality_responses',
-                'count': len(low_quality),
-                'description': f'{len(low_quality)} conversations had low quality scores',
-                'sample_queries': [c.actual_query for c in low_quality[:3]]
-            })
+        gaps.extend(self._knowledge_gap(
+            session, recent, Conversation.response_quality_score < 0.3,
+            'low_quality_responses', 'conversations had low quality scores'
+        ))
         
         # Find fallback responses (indicates missing knowledge)
-        fallback_responses = [c for c in conversations if c.response_method == 'fallback']
-        
-        if fallback_responses:
-            gaps.append({
-                'type': 'fallback_responses',
-                'count': len(fallback_responses),
-                'description': f'{len(fallback_responses)} conversations used fallback responses',
-                'sample_queries': [c.actual_query for c in fallback_responses[:3]]
-            })
+        gaps.extend(self._knowledge_gap(
+            session, recent, Conversation.response_method == 'fallback',
+            'fallback_responses', 'conversations used fallback responses'
+        ))
         
         return gaps
+    
+    def _knowledge_gap(self, session, recent, condition, gap_type: str, description: str) -> List[Dict[str, Any]]:
+        """Count conversations matching a gap condition and sample three of their queries"""
+        count = session.query(func.count(Conversation.conversation_id)).filter(recent, condition).scalar()
+        if not count:
+            return []
+        
+        samples = session.query(Conversation.actual_query).filter(recent, condition).limit(3).all()
+        return [{
+            'type': gap_type,
+            'count': count,
+            'description': f'{count} {description}',
+            'sample_queries': [query for (query,) in samples]
+        }]
 
-# Global logger instance - Initialize with None to disable database logging
-# Set environment variable SKIP_DB_LOGGING=true to disable logging for local testing
-conversation_logger = ConversationLogger(database_url=None if os.getenv('SKIP_DB_LOGGING') == 'true' else os.getenv('DATABASE_URL'))
-
-
-
-
-
-
-
-
-
-
-
+class NullConversationLogger:
+    """Stand-in used when database logging is disabled; same interface, does nothing"""
+    
+    def log_conversation(self, *args, **kwargs) -> Optional[str]:
+        return None
+    
+    def flush(self):
+        pass
+    
+    def get_conversation_stats(self, hours: int = 24) -> Dict[str, Any]:
+        return {}
+    
+    def get_analytics_dashboard_data(self) -> Dict[str, Any]:
+        return {}
 
+# Global logger instance, created on first use so importing this module doesn't touch the database
+# Set environment variable SKIP_DB_LOGGING=true (or leave DATABASE_URL unset) to disable logging
+@functools.cache
+def get_conversation_logger():
+    """Return the process-wide conversation logger"""
+    database_url = os.getenv('DATABASE_URL')
+    if os.getenv('SKIP_DB_LOGGING') == 'true' or not database_url:
+        logger.info("Database logging disabled")
+        return NullConversationLogger()
+    return ConversationLogger(database_url=database_url)
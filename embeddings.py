@@ -0,0 +1,101 @@
+import abc
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+LOCAL_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+class _MemoizingEmbedder(abc.ABC):
+    """LRU-memoized embedder; subclasses implement _embed_batch for the misses"""
+
+    def __init__(self, cache_size: int = 10_000):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text, reusing the cached vector when it has been seen before"""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed several texts with at most one backend call for all cache misses"""
+        vectors = {}
+        with self._lock:
+            for text in texts:
+                if text in self._cache:
+                    self._cache.move_to_end(text)
+                    vectors[text] = self._cache[text]
+        misses = list(dict.fromkeys(t for t in texts if t not in vectors))
+
+        if misses:
+            embedded = self._embed_batch(misses)
+            with self._lock:
+                for text, vector in zip(misses, embedded):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    vector.flags.writeable = False
+                    vectors[text] = vector
+                    self._cache[text] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [vectors[text] for text in texts]
+
+    @abc.abstractmethod
+    def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with the backend, one vector per text, in order"""
+
+class OpenAIEmbedder(_MemoizingEmbedder):
+    """Memoizing, batching wrapper around the OpenAI embeddings endpoint"""
+
+    def __init__(self, client, model: str = EMBEDDING_MODEL, cache_size: int = 10_000):
+        super().__init__(cache_size)
+        self.client = client
+        self.model = model
+
+    def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        result = self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(result.data, key=lambda d: d.index)]
+
+class LocalEmbedder(_MemoizingEmbedder):
+    """Memoizing wrapper around a local sentence-transformers model (no network call)"""
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, cache_size: int = 10_000):
+        super().__init__(cache_size)
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model)
+
+    def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        # Unit-length output, so cosine similarity is a plain dot product
+        return list(self.model.encode(texts, normalize_embeddings=True))
+
+def embedding_backend() -> Optional[str]:
+    """The opted-in EMBEDDING_BACKEND ('local' or 'openai'), or None when semantic caching is off"""
+    backend = os.getenv('EMBEDDING_BACKEND', 'none').strip().lower()
+    return backend if backend in ('local', 'openai') else None
+
+def create_embedder(openai_client=None):
+    """Build the query embedder for the response cache, or None
+
+    The semantic tier is opt-in: EMBEDDING_BACKEND=local loads the local
+    sentence-transformers model (milliseconds per query, no network round
+    trip), EMBEDDING_BACKEND=openai uses the OpenAI embeddings API. Unset,
+    only exact-match caching is used and no model is loaded.
+    """
+    backend = embedding_backend()
+    if backend == 'local':
+        try:
+            return LocalEmbedder()
+        except Exception as e:
+            logger.warning(f"Local embedding model unavailable: {e}")
+    elif backend == 'openai':
+        if openai_client is not None:
+            return OpenAIEmbedder(openai_client)
+        logger.warning("EMBEDDING_BACKEND=openai but no OpenAI client is configured")
+    return None
@@ -0,0 +1,71 @@
+import re
+import sys
+from typing import Dict, Iterable, Sequence, Tuple
+
+Rules = Sequence[Tuple[str, Sequence[str]]]
+
+class KeywordMatcher:
+    """Classify text against several keyword rule lists in a single scan
+
+    Each field (e.g. "intent") has an ordered list of (label, keywords) rules;
+    the first rule with any keyword occurring as a substring of the text wins,
+    exactly like an if/elif chain of ``any(word in text for word in ...)``.
+    Instead of one substring search per keyword, every keyword of every field
+    is compiled into one longest-first alternation and the text is scanned once.
+    """
+
+    def __init__(self, fields: Dict[str, Rules], defaults: Dict[str, str]):
+        # Labels and keywords may come from config rather than literals; intern them
+        # so the dict and set lookups below compare by identity
+        self.fields = {field: [(sys.intern(label), frozenset(sys.intern(word) for word in words))
+                               for label, words in rules]
+                       for field, rules in fields.items()}
+        self.defaults = dict(defaults)
+
+        keywords = {word for rules in self.fields.values() for _, words in rules for word in words}
+        ordered = sorted(keywords, key=len, reverse=True)
+        # Zero-width lookahead, so a match never consumes text and overlapping
+        # keywords ("medical" in "biomedicalaw" next to "law") are all seen
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(word) for word in ordered) + "))")
+        # A scan reports only the longest keyword at each position, so a match
+        # also counts for every keyword it contains ("application" -> "applica"...)
+        self._contained = {word: frozenset(other for other in keywords if other in word)
+                           for word in keywords}
+        # Per field, the labels each keyword selects, for callers that want every match
+        self._labels = {field: {word: frozenset(label for label, words in rules if word in words)
+                                for _, words in rules for word in words}
+                        for field, rules in self.fields.items()}
+
+    def keywords_in(self, text: str) -> frozenset:
+        """Return every keyword occurring in the (already lowercased) text"""
+        found = set()
+        for match in self._pattern.finditer(text):
+            found |= self._contained[match.group(1)]
+        return frozenset(found)
+
+    def labels_in(self, text: str, field: str) -> frozenset:
+        """Return every label of the field with a keyword in the (already lowercased) text"""
+        return self._labels_for(field, self.keywords_in(text))
+
+    def all_labels_in(self, text: str) -> Dict[str, frozenset]:
+        """Return {field: every label with a keyword in the text} from a single scan"""
+        found = self.keywords_in(text)
+        return {field: self._labels_for(field, found) for field in self.fields}
+
+    def _labels_for(self, field: str, found: frozenset) -> frozenset:
+        labels = self._labels[field]
+        matched = set()
+        for word in found:
+            matched |= labels.get(word, frozenset())
+        return frozenset(matched)
+
+    def classify(self, text: str, fields: Iterable[str] = None) -> Dict[str, str]:
+        """Return {field: label} for the (already lowercased) text"""
+        found = self.keywords_in(text)
+        return {field: self._first_match(field, found) for field in (fields or self.fields)}
+
+    def _first_match(self, field: str, found: frozenset) -> str:
+        for label, words in self.fields[field]:
+            if not words.isdisjoint(found):
+                return label
+        return self.defaults.get(field)
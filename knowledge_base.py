@@ -1,225 +1,340 @@
-import json
-import pandas as pd
-from typing import Dict, List, Any
+import functools
+import string
+import sys
+from collections import Counter
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 import logging
+import numpy as np
+import orjson
+from keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
-class CUNYKnowledgeBase:
-    """Knowledge base containing CUNY-specific information"""
+SEARCH_CACHE_SIZE = 1024  # distinct normalized queries whose results are kept
+
+# Punctuation (including "_", "$" and "'") separates tokens, so subcategory keys
+# such as "non_ny_resident" index as their words
+_PUNCTUATION = str.maketrans({c: ' ' for c in string.punctuation})
+
+def _tokenize(text: str) -> List[str]:
+    """Split already lowercased text into word tokens"""
+    return text.translate(_PUNCTUATION).split()
+
+# Keywords that make a query match each category
+CATEGORY_KEYWORDS = {
+    'admissions': ['admission', 'apply', 'application', 'requirements', 'deadline'],
+    'tuition_fees': ['tuition', 'fee', 'cost', 'price', 'payment'],
+    'scholarships': ['scholarship', 'financial aid', 'grant', 'money'],
+    'campus_life': ['campus', 'life', 'housing', 'meal', 'activity', 'club'],
+    'academics': ['major', 'class', 'course', 'academic', 'study'],
+    'campus_tours': ['tour', 'visit', 'campus tour', 'virtual'],
+    'student_services': ['service', 'help', 'support', 'advising'],
+    'technology': ['wifi', 'computer', 'technology', 'software'],
+    'transportation': ['transport', 'subway', 'bus', 'parking']
+}
+
+_CATEGORY_MATCHER = KeywordMatcher({'category': [(c, kws) for c, kws in CATEGORY_KEYWORDS.items()]}, {})
+
+def _freeze(value: Any) -> Any:
+    """Read-only deep copy: dicts become MappingProxyType, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _flatten_text(value: Any) -> str:
+    """Every key and leaf value under a (frozen) value, space separated"""
+    if isinstance(value, Mapping):
+        return ' '.join(f"{key} {_flatten_text(item)}" for key, item in value.items())
+    if isinstance(value, tuple):
+        return ' '.join(_flatten_text(item) for item in value)
+    return str(value)
+
+def _build_category_text(data: Mapping[str, Any]) -> Dict[str, str]:
+    """Flatten each category to the lowercased text relevance is scored against"""
+    category_text = {}
+    for category, value in data.items():
+        if isinstance(value, Mapping):
+            text = ' '.join(_flatten_text(v) for v in value.values())
+        else:
+            text = _flatten_text(value)
+        category_text[category] = text.lower()
+    return category_text
+
+def _build_term_matrix(category_text: Dict[str, str]) -> Tuple[Dict[str, int], np.ndarray]:
+    """Intern tokens to ids and count them: row per category (in data order), column per token id"""
+    counts = [Counter(_tokenize(text)) for text in category_text.values()]
+    vocab: Dict[str, int] = {}
+    for category_counts in counts:
+        for token in category_counts:
+            # Tokens are built at runtime, so unlike literals they are not interned already
+            vocab.setdefault(sys.intern(token), len(vocab))
+    term_counts = np.zeros((len(counts), len(vocab)), dtype=np.int32)
+    for row, category_counts in enumerate(counts):
+        for token, tf in category_counts.items():
+            term_counts[row, vocab[token]] = tf
+    term_counts.flags.writeable = False
+    return vocab, term_counts
+
+def _render_context(data: Mapping[str, Any]) -> Dict[str, str]:
+    """Render every category to its LLM context string"""
+    return {category: _format_category_context(category, value) for category, value in data.items()}
+
+def _format_category_context(category: str, data: Any) -> str:
+    """Format one category for context"""
+    if isinstance(data, Mapping):
+        formatted_data = _format_dict_for_context(data)
+    elif isinstance(data, tuple):
+        formatted_data = ", ".join(str(item) for item in data)
+    else:
+        formatted_data = str(data)
     
-    def __init__(self):
-        self.data = self._load_knowledge_base()
-        
-    def _load_knowledge_base(self) -> Dict[str, Any]:
-        """Load comprehensive CUNY knowledge base"""
-        return {
-            "admissions": {
-                "requirements": {
-                    "freshman": {
-                        "gpa": "Minimum 2.0 GPA",
-                        "sat": "SAT scores recommended but not required for most programs",
-                        "transcript": "Official high school transcript required",
-                        "essay": "Personal statement required",
-                        "recommendations": "Letters of recommendation recommended"
-                    },
-                    "transfer": {
-                        "credits": "Minimum 12 college credits",
-                        "gpa": "Minimum 2.0 GPA",
-                        "transcript": "Official college transcript required"
-                    },
-                    "international": {
-                        "toefl": "TOEFL score of 80+ or IELTS 6.5+",
-                        "transcript": "Official transcript with English translation",
-                        "visa": "Valid student visa required"
-                    }
-                },
-                "deadlines": {
-                    "fall": "February 1st (priority), April 1st (regular)",
-                    "spring": "September 15th",
-                    "summer": "March 1st"
-                },
-                "application_fee": "$65 for most colleges"
-            },
-            
-            "tuition_fees": {
-                "undergraduate": {
-                    "ny_resident": "$3,465 per semester",
-                    "non_ny_resident": "$620 per credit",
-                    "international": "$620 per credit"
-                },
-                "graduate": {
-                    "ny_resident": "$5,545 per semester",
-                    "non_ny_resident": "$855 per credit",
-                    "international": "$855 per credit"
-                },
-                "additional_fees": {
-                    "student_activity": "$15-25 per semester",
-                    "technology": "$125 per semester",
-                    "health_insurance": "$1,000+ per year (if not covered)"
-                }
-            },
-            
-            "scholarships": {
-                "cuny_excellence": {
-                    "amount": "Up to $6,500 per year",
-                    "requirements": "3.5+ GPA, leadership activities",
-                    "deadline": "March 1st"
-                },
-                "presidential_scholarship": {
-                    "amount": "Full tuition coverage",
-                    "requirements": "4.0 GPA, exceptional achievements",
-                    "deadline": "February 1st"
-                },
-                "transfer_scholarship": {
-                    "amount": "Up to $4,000 per year",
-                    "requirements": "3.0+ GPA, 30+ transfer credits",
-                    "deadline": "April 15th"
-                },
-                "need_based": {
-                    "pell_grant": "Up to $6,895 per year",
-                    "tap_grant": "Up to $5,665 per year (NY residents)",
-                    "requirements": "FAFSA completion required"
-                }
-            },
-            
-            "campus_life": {
-                "housing": {
-                    "on_campus": "Limited availability, $8,000-12,000 per year",
-                    "off_campus": "Various options in NYC, $1,200-2,500 per month",
-                    "meal_plans": {
-                        "basic": "$1,200 per semester",
-                        "premium": "$2,000 per semester",
-                        "flex": "Pay-as-you-go options available"
-                    }
-                },
-                "activities": {
-                    "clubs": "200+ student organizations",
-                    "sports": "NCAA Division III athletics",
-                    "cultural": "Diverse cultural events and celebrations",
-                    "leadership": "Student government and leadership programs"
-                },
-                "safety": {
-                    "campus_police": "24/7 campus security",
-                    "escort_service": "Free campus escort service",
-                    "emergency": "Blue light emergency phones throughout campus",
-                    "crime_rate": "Low crime rate with active safety programs"
-                }
-            },
-            
-            "academics": {
-                "majors": [
-                    "Business Administration", "Computer Science", "Psychology",
-                    "Biology", "English", "Mathematics", "History", "Political Science",
-                    "Sociology", "Economics", "Engineering", "Education", "Nursing",
-                    "Criminal Justice", "Media Studies", "Art", "Music", "Theater"
-                ],
-                "class_size": "Average 25 students per class",
-                "faculty": "90% hold terminal degrees",
-                "research": "Extensive undergraduate research opportunities",
-                "internships": "Strong NYC internship connections"
-            },
-            
-            "campus_tours": {
-                "in_person": {
-                    "schedule": "Monday-Friday, 10 AM and 2 PM",
-                    "duration": "90 minutes",
-                    "registration": "Required 48 hours in advance",
-                    "group_size": "Maximum 15 students per tour"
-                },
-                "virtual": {
-                    "availability": "24/7 online virtual tours",
-                    "features": "360-degree campus views, student testimonials",
-                    "registration": "Not required for virtual tours"
-                }
-            },
-            
-            "student_services": {
-                "academic_advising": "Free academic counseling",
-                "career_services": "Job placement assistance, resume help",
-                "health_services": "On-campus health clinic",
-                "counseling": "Free mental health counseling",
-                "disability_services": "Comprehensive accommodation support",
-                "tutoring": "Free peer and professional tutoring"
+    return f"{category.replace('_', ' ').title()}: {formatted_data}"
+
+def _format_dict_for_context(data: Mapping[str, Any], indent: int = 0) -> str:
+    """Format dictionary data for context"""
+    parts = []
+    for key, value in data.items():
+        if isinstance(value, Mapping):
+            formatted_value = _format_dict_for_context(value, indent + 1)
+            parts.append(f"{key.replace('_', ' ').title()}: {formatted_value}")
+        elif isinstance(value, tuple):
+            formatted_value = ", ".join(str(item) for item in value)
+            parts.append(f"{key.replace('_', ' ').title()}: {formatted_value}")
+        else:
+            parts.append(f"{key.replace('_', ' ').title()}: {value}")
+    
+    return "; ".join(parts)
+
+# The knowledge base itself: built and frozen once per process and shared,
+# read-only, by every CUNYKnowledgeBase instance
+_KB_DATA = _freeze({
+    "admissions": {
+        "requirements": {
+            "freshman": {
+                "gpa": "Minimum 2.0 GPA",
+                "sat": "SAT scores recommended but not required for most programs",
+                "transcript": "Official high school transcript required",
+                "essay": "Personal statement required",
+                "recommendations": "Letters of recommendation recommended"
             },
-            
-            "technology": {
-                "wifi": "Free campus-wide WiFi",
-                "computer_labs": "24/7 computer lab access",
-                "software": "Free Microsoft Office and Adobe Creative Suite",
-                "online_learning": "Hybrid and online course options"
+            "transfer": {
+                "credits": "Minimum 12 college credits",
+                "gpa": "Minimum 2.0 GPA",
+                "transcript": "Official college transcript required"
             },
-            
-            "transportation": {
-                "subway": "Convenient access to NYC subway system",
-                "bus": "Multiple bus routes serve all campuses",
-                "parking": "Limited on-campus parking available",
-                "bike": "Bike racks and storage facilities"
+            "international": {
+                "toefl": "TOEFL score of 80+ or IELTS 6.5+",
+                "transcript": "Official transcript with English translation",
+                "visa": "Valid student visa required"
+            }
+        },
+        "deadlines": {
+            "fall": "February 1st (priority), April 1st (regular)",
+            "spring": "September 15th",
+            "summer": "March 1st"
+        },
+        "application_fee": "$65 for most colleges"
+    },
+    
+    "tuition_fees": {
+        "undergraduate": {
+            "ny_resident": "$3,465 per semester",
+            "non_ny_resident": "$620 per credit",
+            "international": "$620 per credit"
+        },
+        "graduate": {
+            "ny_resident": "$5,545 per semester",
+            "non_ny_resident": "$855 per credit",
+            "international": "$855 per credit"
+        },
+        "additional_fees": {
+            "student_activity": "$15-25 per semester",
+            "technology": "$125 per semester",
+            "health_insurance": "$1,000+ per year (if not covered)"
+        }
+    },
+    
+    "scholarships": {
+        "cuny_excellence": {
+            "amount": "Up to $6,500 per year",
+            "requirements": "3.5+ GPA, leadership activities",
+            "deadline": "March 1st"
+        },
+        "presidential_scholarship": {
+            "amount": "Full tuition coverage",
+            "requirements": "4.0 GPA, exceptional achievements",
+            "deadline": "February 1st"
+        },
+        "transfer_scholarship": {
+            "amount": "Up to $4,000 per year",
+            "requirements": "3.0+ GPA, 30+ transfer credits",
+            "deadline": "April 15th"
+        },
+        "need_based": {
+            "pell_grant": "Up to $6,895 per year",
+            "tap_grant": "Up to $5,665 per year (NY residents)",
+            "requirements": "FAFSA completion required"
+        }
+    },
+    
+    "campus_life": {
+        "housing": {
+            "on_campus": "Limited availability, $8,000-12,000 per year",
+            "off_campus": "Various options in NYC, $1,200-2,500 per month",
+            "meal_plans": {
+                "basic": "$1,200 per semester",
+                "premium": "$2,000 per semester",
+                "flex": "Pay-as-you-go options available"
             }
+        },
+        "activities": {
+            "clubs": "200+ student organizations",
+            "sports": "NCAA Division III athletics",
+            "cultural": "Diverse cultural events and celebrations",
+            "leadership": "Student government and leadership programs"
+        },
+        "safety": {
+            "campus_police": "24/7 campus security",
+            "escort_service": "Free campus escort service",
+            "emergency": "Blue light emergency phones throughout campus",
+            "crime_rate": "Low crime rate with active safety programs"
+        }
+    },
+    
+    "academics": {
+        "majors": [
+            "Business Administration", "Computer Science", "Psychology",
+            "Biology", "English", "Mathematics", "History", "Political Science",
+            "Sociology", "Economics", "Engineering", "Education", "Nursing",
+            "Criminal Justice", "Media Studies", "Art", "Music", "Theater"
+        ],
+        "class_size": "Average 25 students per class",
+        "faculty": "90% hold terminal degrees",
+        "research": "Extensive undergraduate research opportunities",
+        "internships": "Strong NYC internship connections"
+    },
+    
+    "campus_tours": {
+        "in_person": {
+            "schedule": "Monday-Friday, 10 AM and 2 PM",
+            "duration": "90 minutes",
+            "registration": "Required 48 hours in advance",
+            "group_size": "Maximum 15 students per tour"
+        },
+        "virtual": {
+            "availability": "24/7 online virtual tours",
+            "features": "360-degree campus views, student testimonials",
+            "registration": "Not required for virtual tours"
         }
+    },
+    
+    "student_services": {
+        "academic_advising": "Free academic counseling",
+        "career_services": "Job placement assistance, resume help",
+        "health_services": "On-campus health clinic",
+        "counseling": "Free mental health counseling",
+        "disability_services": "Comprehensive accommodation support",
+        "tutoring": "Free peer and professional tutoring"
+    },
+    
+    "technology": {
+        "wifi": "Free campus-wide WiFi",
+        "computer_labs": "24/7 computer lab access",
+        "software": "Free Microsoft Office and Adobe Creative Suite",
+        "online_learning": "Hybrid and online course options"
+    },
+    
+    "transportation": {
+        "subway": "Convenient access to NYC subway system",
+        "bus": "Multiple bus routes serve all campuses",
+        "parking": "Limited on-campus parking available",
+        "bike": "Bike racks and storage facilities"
+    }
+})
+
+# Everything derived from it is computed once at import as well
+_CONTEXT = _render_context(_KB_DATA)
+_CATEGORY_TEXT = _build_category_text(_KB_DATA)
+_VOCAB, _TERM_COUNTS = _build_term_matrix(_CATEGORY_TEXT)
+# Parallel to the term-count rows: category name and row number per category
+_CATEGORIES = tuple(_KB_DATA)
+_CATEGORY_ROWS = {category: row for row, category in enumerate(_CATEGORIES)}
+# Every node get_specific_info can return, keyed by (category, subcategory or None)
+_NODES = {(category, None): value for category, value in _KB_DATA.items()}
+_NODES.update(((category, subcategory), node)
+              for category, value in _KB_DATA.items() if isinstance(value, Mapping)
+              for subcategory, node in value.items())
+# ...and each of them serialized once, for the API to send as is
+_NODES_JSON = {key: orjson.dumps(node, default=dict) for key, node in _NODES.items()}
+
+class CUNYKnowledgeBase:
+    """Knowledge base containing CUNY-specific information"""
+    
+    def __init__(self):
+        # Bumped on every reload so callers can tell cached derived data is stale
+        self.version = 0
+        self._load()
+    
+    def reload(self):
+        """Start over with a fresh search cache; the data is a process-wide constant"""
+        self._load()
+        self.version += 1
+    
+    def _load(self):
+        """Bind the shared data and its precomputed indexes, and create the search cache"""
+        self.data = _KB_DATA
+        self._context = _CONTEXT
+        self._category_text = _CATEGORY_TEXT
+        self._vocab, self._term_counts = _VOCAB, _TERM_COUNTS
+        self._categories, self._category_rows = _CATEGORIES, _CATEGORY_ROWS
+        # Repeated questions skip scoring entirely; a fresh cache per load keeps it in step with the data
+        self._search_cached = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
     
     def search(self, query: str) -> List[Dict[str, Any]]:
         """Search knowledge base for relevant information"""
-        query_lower = query.lower()
-        results = []
-        
-        # Search through all categories
-        for category, data in self.data.items():
-            if self._matches_category(query_lower, category):
-                results.append({
-                    'category': category,
-                    'data': data,
-                    'relevance': self._calculate_relevance(query_lower, data)
-                })
-        
-        # Sort by relevance
-        results.sort(key=lambda x: x['relevance'], reverse=True)
-        return results[:5]  # Return top 5 most relevant results
-    
-    def _matches_category(self, query: str, category: str) -> bool:
-        """Check if query matches a category"""
-        category_keywords = {
-            'admissions': ['admission', 'apply', 'application', 'requirements', 'deadline'],
-            'tuition_fees': ['tuition', 'fee', 'cost', 'price', 'payment'],
-            'scholarships': ['scholarship', 'financial aid', 'grant', 'money'],
-            'campus_life': ['campus', 'life', 'housing', 'meal', 'activity', 'club'],
-            'academics': ['major', 'class', 'course', 'academic', 'study'],
-            'campus_tours': ['tour', 'visit', 'campus tour', 'virtual'],
-            'student_services': ['service', 'help', 'support', 'advising'],
-            'technology': ['wifi', 'computer', 'technology', 'software'],
-            'transportation': ['transport', 'subway', 'bus', 'parking']
-        }
-        
-        if category in category_keywords:
-            return any(keyword in query for keyword in category_keywords[category])
-        return False
-    
-    def _calculate_relevance(self, query: str, data: Any) -> float:
-        """Calculate relevance score for search results"""
-        if isinstance(data, dict):
-            text = ' '.join(str(v) for v in data.values())
-        elif isinstance(data, list):
-            text = ' '.join(str(item) for item in data)
-        else:
-            text = str(data)
-        
-        text_lower = text.lower()
-        relevance = 0.0
+        # Case and whitespace variants of a query share one cache entry
+        return list(self._search_cached(" ".join(query.lower().split())))
+    
+    def search_cache_info(self):
+        """Hit/miss statistics of the search cache"""
+        return self._search_cached.cache_info()
+    
+    def _search(self, query_lower: str) -> tuple:
+        """Score and rank categories for a normalized query; results are cached, so read-only"""
+        # One left-to-right scan of the query yields every category with a
+        # keyword in it (substring matches, as before)
+        matched = _CATEGORY_MATCHER.labels_in(query_lower, 'category')
+        if not matched:
+            return ()
         
-        # Simple keyword matching
-        query_words = query.split()
-        for word in query_words:
-            if word in text_lower:
-                relevance += 1.0
+        # Score only the matched rows: sum their term-count columns for the
+        # query's known tokens (repeats counted, unknown tokens ignored)
+        rows = sorted(self._category_rows[category] for category in matched)
+        token_ids = [self._vocab[token] for token in _tokenize(query_lower) if token in self._vocab]
+        if not token_ids:
+            # Nothing to score: every candidate ties at zero, in knowledge-base order
+            return tuple(self._result(row, 0.0) for row in rows[:5])
+        scores = self._term_counts[np.ix_(rows, token_ids)].sum(axis=1)
         
-        return relevance
+        # Stable sort, so equal scores keep knowledge-base order; top 5 only
+        top = np.argsort(-scores, kind='stable')[:5]
+        return tuple(self._result(rows[i], float(scores[i])) for i in top)
+    
+    def _result(self, row: int, relevance: float) -> Dict[str, Any]:
+        category = self._categories[row]
+        return {'category': category, 'data': self.data[category], 'relevance': relevance}
+    
+    def get_context(self, category: str) -> str:
+        """Get the pre-rendered LLM context string for a category"""
+        return self._context[category]
     
     def get_specific_info(self, category: str, subcategory: str = None) -> Any:
-        """Get specific information from knowledge base"""
-        if category not in self.data:
-            return None
-        
-        if subcategory:
-            return self.data[category].get(subcategory)
-        
-        return self.data[category]
+        """Get specific information from knowledge base (read-only mappings and tuples)"""
+        return _NODES.get((category, subcategory or None))
+    
+    def get_specific_info_json(self, category: str, subcategory: str = None) -> Optional[bytes]:
+        """get_specific_info() as pre-serialized JSON bytes, or None if there is no such entry"""
+        return _NODES_JSON.get((category, subcategory or None))
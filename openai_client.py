@@ -0,0 +1,25 @@
+from functools import lru_cache
+
+import httpx
+import openai
+
+# One keep-alive pool per process, shared by every chat, embedding and live-search
+# call, so concurrent requests reuse (and with HTTP/2 multiplex) the same
+# connections to api.openai.com instead of handshaking per call
+MAX_CONNECTIONS = 128
+MAX_KEEPALIVE_CONNECTIONS = 64
+REQUEST_TIMEOUT_SECONDS = 30.0
+# The SDK retries connection errors, 408/409/429 and 5xx itself, with exponential
+# backoff and jitter that honours Retry-After; four attempts in all
+MAX_RETRIES = 3
+
+@lru_cache(maxsize=None)
+def get_openai_client(api_key: str) -> openai.OpenAI:
+    """Return the process-wide OpenAI client for an API key"""
+    http_client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                            max_connections=MAX_CONNECTIONS),
+        timeout=REQUEST_TIMEOUT_SECONDS,
+    )
+    return openai.OpenAI(api_key=api_key, http_client=http_client, max_retries=MAX_RETRIES)
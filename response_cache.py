@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def normalize_message(message: str) -> str:
+    """Collapse case and whitespace so trivially different messages share a key"""
+    return " ".join(message.lower().split())
+
+EXACT = "exact"
+SEMANTIC = "semantic"
+
+class ResponseCache:
+    """Two-tier chatbot response cache: exact-match LRU plus embedding similarity
+
+    Entries may carry a TTL in seconds; expired entries are never returned.
+    """
+
+    def __init__(self,
+                 embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+                 max_exact: int = 2048,
+                 max_semantic: int = 2048,
+                 similarity_threshold: float = 0.92):
+        self.embed_fn = embed_fn
+        self.max_exact = max_exact
+        self.max_semantic = max_semantic
+        self.similarity_threshold = similarity_threshold
+
+        self._lock = threading.Lock()
+        # (normalized message, context_key) -> (value, expires_at)
+        self._exact: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = OrderedDict()
+
+        # Semantic tier: a ring buffer of unit-length embeddings, so cosine
+        # similarity against every cached query is a single matrix-vector product
+        self._vectors: Optional[np.ndarray] = None
+        self._entries = [None] * max_semantic  # (context_key, value, expires_at) per row
+        self._size = 0
+        self._next_slot = 0
+
+    def get(self, message: str, context_key: str = "") -> Optional[Any]:
+        """Return a cached value for the message, or None on a miss"""
+        hit = self.lookup(message, context_key)
+        return hit[0] if hit else None
+
+    def embed(self, message: str) -> Optional[np.ndarray]:
+        """Embed a message the way the semantic tier does, so callers can reuse the vector"""
+        return self._embed(normalize_message(message))
+
+    def lookup(self, message: str, context_key: str = "",
+               embedding: Optional[np.ndarray] = None) -> Optional[Tuple[Any, str]]:
+        """Return (value, tier) for the message, where tier is EXACT or SEMANTIC, or None
+
+        Pass the vector from embed() as embedding to avoid embedding the message again.
+        """
+        key = (normalize_message(message), context_key)
+        now = time.time()
+        with self._lock:
+            if key in self._exact:
+                value, expires_at = self._exact[key]
+                if expires_at > now:
+                    self._exact.move_to_end(key)
+                    return value, EXACT
+                del self._exact[key]
+
+        query = embedding if embedding is not None else self._embed(key[0])
+        if query is None:
+            return None
+
+        with self._lock:
+            if not self._size:
+                return None
+            sims = self._vectors[:self._size] @ query
+            # Only consider entries recorded under the same conversation context
+            for idx in np.argsort(-sims):
+                if sims[idx] < self.similarity_threshold:
+                    break
+                entry_context, value, expires_at = self._entries[idx]
+                if entry_context == context_key and expires_at > now:
+                    return value, SEMANTIC
+        return None
+
+    def put(self, message: str, value: Any, context_key: str = "", ttl: Optional[float] = None,
+            embedding: Optional[np.ndarray] = None):
+        """Store a value under both the exact and the semantic tier for ttl seconds (None: no expiry)"""
+        key = (normalize_message(message), context_key)
+        expires_at = time.time() + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._exact[key] = (value, expires_at)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_exact:
+                self._exact.popitem(last=False)
+
+        vector = embedding if embedding is not None else self._embed(key[0])
+        if vector is None:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_semantic, vector.shape[0]), dtype=np.float32)
+            slot = self._next_slot
+            self._vectors[slot] = vector
+            self._entries[slot] = (context_key, value, expires_at)
+            self._next_slot = (slot + 1) % self.max_semantic
+            self._size = min(self._size + 1, self.max_semantic)
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text as a unit-length float32 vector, or None if unavailable"""
+        if self.embed_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        return vector / norm
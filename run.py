@@ -4,22 +4,23 @@ CUNY Chatbot Startup Script
 This script provides an easy way to start the chatbot with different configurations.
 """
 
+import contextlib
+import importlib.util
+import io
 import os
 import sys
-import subprocess
 from pathlib import Path
 
 def check_dependencies():
     """Check if required dependencies are installed"""
-    try:
-        import flask
-        import openai
-        print("✅ All dependencies are installed")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+    # find_spec locates the packages without paying for importing them here
+    missing = [name for name in ('flask', 'openai') if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing dependency: No module named '{missing[0]}'")
         print("Please run: pip install -r requirements.txt")
         return False
+    print("✅ All dependencies are installed")
+    return True
 
 def check_openai_key():
     """Check if OpenAI API key is set"""
@@ -36,16 +37,22 @@ def check_openai_key():
 def run_tests():
     """Run the test suite"""
     print("\n🧪 Running tests...")
+    # In-process rather than a second interpreter, so the server started
+    # afterwards reuses the modules the tests already imported
+    output = io.StringIO()
     try:
-        result = subprocess.run([sys.executable, 'test_chatbot.py'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
+        import test_chatbot
+        with contextlib.redirect_stdout(output):
+            test_chatbot.main()
+        print("✅ Tests passed!")
+        return True
+    except SystemExit as e:
+        if not e.code:
             print("✅ Tests passed!")
             return True
-        else:
-            print("❌ Tests failed:")
-            print(result.stderr)
-            return False
+        print("❌ Tests failed:")
+        print(output.getvalue())
+        return False
     except Exception as e:
         print(f"❌ Error running tests: {e}")
         return False
@@ -57,7 +64,8 @@ def start_server():
     print("   Press Ctrl+C to stop the server")
     
     try:
-        subprocess.run([sys.executable, 'app.py'])
+        from app import run_development_server
+        run_development_server()
     except KeyboardInterrupt:
         print("\n👋 Server stopped. Goodbye!")
     except Exception as e:
@@ -51,8 +51,8 @@ class CUNYChatbot {
                 content: msg.content
             }));
 
-            // Send to API
-            const response = await fetch('/api/chat', {
+            // Send to API; the answer streams back as Server-Sent Events
+            const response = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -63,15 +63,29 @@ class CUNYChatbot {
                 })
             });
 
-            const data = await response.json();
-
-            if (response.ok) {
-                // Add bot response to chat
-                this.addMessage(data.response, 'bot');
-            } else {
+            if (!response.ok) {
+                const data = await response.json();
                 throw new Error(data.error || 'Failed to get response');
             }
 
+            // Show the bot response as it arrives
+            let text = '';
+            let updateReply = null;
+            await this.readEvents(response, (event, data) => {
+                if (event === 'error') {
+                    throw new Error(data.error || 'Failed to get response');
+                }
+                if (event === 'message') {
+                    text += data.delta;
+                    if (updateReply) {
+                        updateReply(text);
+                    } else {
+                        this.hideLoading();
+                        updateReply = this.addMessage(text, 'bot');
+                    }
+                }
+            });
+
         } catch (error) {
             console.error('Error:', error);
             this.addMessage('Sorry, I encountered an error. Please try again or contact support.', 'bot');
@@ -80,6 +94,39 @@ class CUNYChatbot {
         }
     }
 
+    async readEvents(response, onEvent) {
+        // Minimal SSE reader for a POST response: frames are separated by a blank
+        // line and carry an optional "event:" line and a JSON "data:" line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                throw new Error('Response ended unexpectedly');
+            }
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let data = '';
+                for (const line of frame.split('\n')) {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                }
+                onEvent(event, data ? JSON.parse(data) : {});
+                if (event === 'done') {
+                    return;
+                }
+            }
+        }
+    }
+
     addMessage(content, type) {
         const chatMessages = document.getElementById('chatMessages');
         const messageDiv = document.createElement('div');
@@ -103,14 +150,22 @@ class CUNYChatbot {
         chatMessages.appendChild(messageDiv);
 
         // Store in conversation history
-        this.conversationHistory.push({
+        const entry = {
             type: type,
             content: content,
             timestamp: new Date().toISOString()
-        });
+        };
+        this.conversationHistory.push(entry);
 
         // Scroll to bottom
         this.scrollToBottom();
+
+        // Returns a function that replaces the message's content, for streamed replies
+        return (newContent) => {
+            entry.content = newContent;
+            messageContent.innerHTML = this.formatMessage(newContent);
+            this.scrollToBottom();
+        };
     }
 
     formatMessage(content) {
@@ -9,11 +9,15 @@ import sys
 from knowledge_base import CUNYKnowledgeBase
 from chatbot import CUNYChatbot
 
+# The knowledge base is immutable, so every test shares one instance (and one chatbot)
+_KB = CUNYKnowledgeBase()
+_BOT = CUNYChatbot(_KB)
+
 def test_knowledge_base():
     """Test the knowledge base functionality"""
     print("Testing Knowledge Base...")
     
-    kb = CUNYKnowledgeBase()
+    kb = _KB
     
     # Test search functionality
     test_queries = [
@@ -48,8 +52,7 @@ def test_chatbot_fallback():
     """Test chatbot fallback responses without OpenAI"""
     print("🧪 Testing Chatbot Fallback Responses...")
     
-    kb = CUNYKnowledgeBase()
-    chatbot = CUNYChatbot(kb)
+    chatbot = _BOT
     
     # Test fallback responses
     test_messages = [
@@ -75,8 +78,7 @@ def test_quick_responses():
     """Test quick response functionality"""
     print("🧪 Testing Quick Responses...")
     
-    kb = CUNYKnowledgeBase()
-    chatbot = CUNYChatbot(kb)
+    chatbot = _BOT
     
     quick_types = ["admissions", "tuition", "scholarships", "campus_life", "majors"]
     
@@ -93,7 +95,7 @@ def test_data_integrity():
     """Test that all required data is present"""
     print("esting Data Integrity")
     
-    kb = CUNYKnowledgeBase()
+    kb = _KB
     data = kb.data
     
     required_categories = [
@@ -129,6 +131,408 @@ def test_data_integrity():
     
     print("Data integrity tests completed!\n")
 
+def test_scraper_extract_xhtml():
+    """XHTML pages with an XML encoding declaration still parse"""
+    from basic_scraper import extract
+    html = ('<?xml version="1.0" encoding="iso-8859-1"?>'
+            '<html><head><title>Café</title></head>'
+            '<body><p>Hunter College</p><a href="/admissions">Apply</a></body></html>')
+    title, text, links = extract(html, "https://www.cuny.edu/")
+    assert title == "Café"
+    assert "Hunter College" in text
+    assert links == ["https://www.cuny.edu/admissions"]
+
+def test_scraper_extract_empty():
+    """Empty and whitespace-only bodies yield an empty result instead of raising"""
+    from basic_scraper import extract
+    for html in ("", "  \n\t "):
+        assert extract(html, "https://www.cuny.edu/") == ("", "", [])
+
+def _sse_frames(body):
+    """Split a Server-Sent Events body into (event, data) pairs"""
+    import json
+    frames = []
+    for frame in body.decode("utf-8").split("\n\n"):
+        if not frame:
+            continue
+        event, data = "message", None
+        for line in frame.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        frames.append((event, data))
+    return frames
+
+def test_chat_stream_events():
+    """The SSE endpoint sends one data frame per piece, then a done event"""
+    from unittest import mock
+    import app
+    client = app.app.test_client()
+    with mock.patch.object(app.chatbot, "get_response_stream", return_value=iter(["Hello", " there"])):
+        response = client.post("/api/chat/stream", json={"message": "hi", "history": None})
+        frames = _sse_frames(response.data)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert frames[:2] == [("message", {"delta": "Hello"}), ("message", {"delta": " there"})]
+    assert len(frames) == 3 and frames[2][0] == "done" and "timestamp" in frames[2][1]
+
+def test_chat_stream_error_event():
+    """A failure after the stream has started ends it with an error event, not done"""
+    from unittest import mock
+    import app
+    def failing_stream(*args):
+        yield "partial"
+        raise RuntimeError("upstream failed")
+    client = app.app.test_client()
+    with mock.patch.object(app.chatbot, "get_response_stream", side_effect=failing_stream):
+        frames = _sse_frames(client.post("/api/chat/stream", json={"message": "hi"}).data)
+    assert frames == [("message", {"delta": "partial"}), ("error", {"error": "Internal server error"})]
+    
+    # Bad requests are rejected before any stream starts
+    assert client.post("/api/chat/stream", json={"message": "  "}).status_code == 400
+    assert client.post("/api/chat/stream", json={"message": "hi", "history": "x"}).status_code == 400
+
+def _stub_embedder(vectors):
+    """embed_fn for ResponseCache that looks each (normalized) message up in a dict"""
+    return lambda text: vectors[text]
+
+def test_response_cache_exact_tier():
+    """Exact hits ignore case and spacing, and are scoped by context key"""
+    from response_cache import EXACT, ResponseCache
+    cache = ResponseCache()
+    assert cache.get("What is tuition?") is None
+    cache.put("What is tuition?", "answer", context_key="ctx")
+    assert cache.lookup("  what IS   tuition? ", "ctx") == ("answer", EXACT)
+    assert cache.get("What is tuition?") is None  # other context
+    assert cache.get("What are fees?", "ctx") is None
+
+def test_response_cache_semantic_threshold():
+    """Near-duplicates hit at or above the similarity threshold and miss below it"""
+    import math
+    import numpy as np
+    from response_cache import SEMANTIC, ResponseCache
+    def at_cosine(cos):
+        return [cos, math.sqrt(1 - cos * cos)]
+    vectors = {"base": [1.0, 0.0], "close": at_cosine(0.95), "far": at_cosine(0.90), "other ctx": [1.0, 0.0]}
+    cache = ResponseCache(embed_fn=_stub_embedder(vectors))
+    assert cache.similarity_threshold == 0.92
+    cache.put("base", "answer")
+    assert cache.lookup("close") == ("answer", SEMANTIC)
+    assert cache.lookup("far") is None
+    assert cache.lookup("other ctx", context_key="x") is None
+    
+    # Exactly at the threshold still hits; just below it misses
+    similarity = float(cache.embed("base") @ cache.embed("far"))
+    cache.similarity_threshold = similarity
+    assert cache.lookup("far") == ("answer", SEMANTIC)
+    cache.similarity_threshold = float(np.nextafter(np.float32(similarity), np.float32(1)))
+    assert cache.lookup("far") is None
+
+def test_response_cache_ttl():
+    """Entries are served until their TTL runs out, from both tiers"""
+    from unittest import mock
+    from response_cache import ResponseCache
+    cache = ResponseCache(embed_fn=_stub_embedder({"a": [1.0, 0.0], "a again": [1.0, 0.0], "b": [0.0, 1.0]}))
+    with mock.patch("response_cache.time.time", return_value=1000.0):
+        cache.put("a", "short-lived", ttl=60)
+        cache.put("b", "forever")
+    with mock.patch("response_cache.time.time", return_value=1059.0):
+        assert cache.get("a") == "short-lived"
+        assert cache.get("a again") == "short-lived"
+    with mock.patch("response_cache.time.time", return_value=1061.0):
+        assert cache.get("a") is None
+        assert cache.get("a again") is None
+        assert cache.get("b") == "forever"
+
+def test_response_cache_eviction():
+    """The exact tier evicts least recently used; the semantic ring overwrites oldest first"""
+    from response_cache import ResponseCache
+    cache = ResponseCache(max_exact=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a is now the most recently used
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    
+    vectors = {"x": [1.0, 0.0, 0.0], "y": [0.0, 1.0, 0.0], "z": [0.0, 0.0, 1.0],
+               "like x": [1.0, 0.0, 0.0], "like y": [0.0, 1.0, 0.0], "like z": [0.0, 0.0, 1.0]}
+    cache = ResponseCache(embed_fn=_stub_embedder(vectors), max_semantic=2)
+    for message in ("x", "y", "z"):
+        cache.put(message, message.upper())
+    assert (cache.get("like x"), cache.get("like y"), cache.get("like z")) == (None, "Y", "Z")
+
+def test_fallback_and_error_answers_not_cached():
+    """Canned fallbacks and "Error generating answer" text never enter the response cache"""
+    from unittest import mock
+    import chatbot
+    from response_cache import ResponseCache
+    bot = CUNYChatbot(_KB)
+    bot.has_openai, bot.openai_client = False, None
+    bot.response_cache = ResponseCache()
+    cases = {
+        "How much is tuition?": {"success": False},
+        "What scholarships are there?": {"success": True, "answer": "Error generating answer: timeout", "sources": []},
+        "Tell me about campus tours": {"success": True, "answer": "Tours run daily.", "sources": []},
+    }
+    with mock.patch.object(chatbot, "get_cuny_answer_for_chatbot", side_effect=lambda q, **kw: cases[q]), \
+            mock.patch.object(bot, "_log_conversation"):
+        for message in cases:
+            bot.get_response(message)
+    context = bot._cache_context(None)
+    assert bot.response_cache.get("How much is tuition?", context) is None
+    assert bot.response_cache.get("What scholarships are there?", context) is None
+    assert bot.response_cache.get("Tell me about campus tours", context) == ("Tours run daily.", [])
+
+def _reference_classify(fields, defaults, text):
+    """The if/elif chains KeywordMatcher replaced: first rule with any keyword in the text"""
+    return {field: next((label for label, words in rules if any(word in text for word in words)),
+                        defaults.get(field))
+            for field, rules in fields.items()}
+
+def test_keyword_matcher_matches_substring_search():
+    """Randomized comparison of KeywordMatcher against plain substring checks"""
+    import random
+    import chatbot
+    from keyword_matcher import KeywordMatcher
+    from knowledge_base import CATEGORY_KEYWORDS
+    rng = random.Random(1234)
+    rule_sets = [
+        ({'intent': chatbot.INTENT_RULES, 'sub_intent': chatbot.SUB_INTENT_RULES,
+          'audience': chatbot.AUDIENCE_RULES, 'fallback_topic': chatbot.FALLBACK_TOPIC_RULES},
+         {'intent': 'general_inquiry', 'sub_intent': 'general', 'audience': 'prospect'}),
+        ({'category': list(CATEGORY_KEYWORDS.items())}, {}),
+        # Keywords nested in and overlapping each other
+        ({'a': [('x', {'ab', 'abc'}), ('y', {'bc', 'b'}), ('z', {'cab', 'ca'})],
+          'b': [('p', {'abcab'}), ('q', {'c', 'a b'})]},
+         {'a': 'none'}),
+    ]
+    for fields, defaults in rule_sets:
+        matcher = KeywordMatcher(fields, defaults)
+        keywords = sorted({word for rules in fields.values() for _, words in rules for word in words})
+        alphabet = sorted(set("".join(keywords)) | {" ", "z", "?"})
+        for _ in range(2000):
+            pieces = [rng.choice(keywords) if rng.random() < 0.4 else
+                      "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+                      for _ in range(rng.randint(0, 6))]
+            text = "".join(pieces)
+            assert matcher.classify(text) == _reference_classify(fields, defaults, text), text
+            assert matcher.keywords_in(text) == {word for word in keywords if word in text}, text
+            for field, rules in fields.items():
+                expected = {label for label, words in rules if any(word in text for word in words)}
+                assert matcher.labels_in(text, field) == expected, text
+
+def test_chatbot_classifier_cases():
+    """Labels the chatbot routes, caches and falls back on"""
+    cases = {
+        "when is the application deadline for international applicants?":
+            ('admission_requirements', 'deadlines', 'applicant', 'admissions'),
+        "how much is tuition for current students?":
+            ('financial_aid', 'general', 'current_student', 'tuition'),
+        "can i check the status of my transcript upload?":
+            ('general_inquiry', 'document_submission', 'prospect', None),
+        "is there financial aid money for transfer credits?":
+            ('financial_aid', 'transfer_credits', 'prospect', 'scholarships'),
+        "can i tour the campus?":
+            ('campus_life', 'general', 'prospect', 'campus_visit'),
+        "what's the office phone number?":
+            ('contact_information', 'general', 'prospect', None),
+        "hello": ('general_inquiry', 'general', 'prospect', None),
+    }
+    for message, expected in cases.items():
+        labels = _BOT._classify(message)
+        assert (labels['intent'], labels['sub_intent'], labels['audience'], labels['fallback_topic']) == expected, message
+
+def test_search_rankings():
+    """Pin search() output: ranking, ties in knowledge-base order, the top-5 cap and no-match queries"""
+    expected = {
+        'campus tour': [('campus_life', 6.0), ('campus_tours', 2.0)],
+        'visit campus': [('campus_life', 6.0), ('campus_tours', 1.0)],
+        # Equal scores keep knowledge-base order
+        'help with the application deadline': [('admissions', 1.0), ('student_services', 1.0)],
+        # Matched categories with no known query token all tie at zero
+        'How much is TUITION?': [('tuition_fees', 0.0)],
+        'financial aid for housing': [('scholarships', 0.0), ('campus_life', 0.0)],
+        'tuitionvisit majorbus': [('tuition_fees', 0.0), ('academics', 0.0),
+                                  ('campus_tours', 0.0), ('transportation', 0.0)],
+        # Eight categories match; only the top five come back
+        'tuition scholarship campus major help wifi bus apply': [
+            ('campus_life', 6.0), ('student_services', 2.0), ('technology', 2.0),
+            ('transportation', 2.0), ('scholarships', 1.0)],
+        'hello there': [],
+        '': [],
+    }
+    for query, ranking in expected.items():
+        results = _KB.search(query)
+        assert [(r['category'], r['relevance']) for r in results] == ranking, query
+        assert all(r['data'] is _KB.data[r['category']] for r in results)
+        # Case and whitespace variants are the same query
+        assert _KB.search("  " + query.upper() + " ") == results
+
+def _sqlite_logger(directory, **attributes):
+    """ConversationLogger on a SQLite file with no drain thread, so only flush() writes rows"""
+    from unittest import mock
+    from conversation_logger import ConversationLogger
+    logger_class = type('TestConversationLogger', (ConversationLogger,), attributes)
+    with mock.patch.object(ConversationLogger, '_drain', lambda self: None):
+        return logger_class(f"sqlite:///{directory}/conversations.db")
+
+def test_conversation_logger_sqlite():
+    """Logged conversations are written on flush and folded into QueryAnalytics"""
+    import tempfile
+    from conversation_logger import Conversation, QueryAnalytics
+    with tempfile.TemporaryDirectory() as directory:
+        conversation_logger = _sqlite_logger(directory)
+        batches = [
+            [('financial_aid', 'fallback', 100), ('financial_aid', 'live_search', 200), ('campus_life', 'static_kb', 50)],
+            [('financial_aid', 'live_search', 600), ('campus_life', 'live_search', 150)],
+        ]
+        for batch in batches:
+            for intent, method, time_ms in batch:
+                conversation_id = conversation_logger.log_conversation(
+                    "question", "answer", response_method=method, user_intent=intent, response_time_ms=time_ms)
+                assert conversation_id
+            conversation_logger.flush()
+        
+        with conversation_logger.SessionLocal.begin() as session:
+            assert session.query(Conversation).count() == 5
+            analytics = {a.query_type: a for a in session.query(QueryAnalytics).all()}
+            assert set(analytics) == {'financial_aid', 'campus_life'}
+            assert analytics['financial_aid'].frequency_count == 3
+            assert analytics['financial_aid'].avg_response_time == 300.0
+            assert analytics['financial_aid'].success_rate == 0.0  # first seen as a fallback
+            assert analytics['campus_life'].frequency_count == 2
+            assert analytics['campus_life'].avg_response_time == 100.0
+            assert analytics['campus_life'].success_rate == 1.0
+        
+        stats = conversation_logger.get_conversation_stats()
+        assert stats['total_conversations'] == 5
+        assert stats['top_intents'] == [{'intent': 'financial_aid', 'count': 3}, {'intent': 'campus_life', 'count': 2}]
+        conversation_logger.engine.dispose()
+
+def test_conversation_logger_queue_full():
+    """A full queue drops the conversation with a warning instead of blocking"""
+    import tempfile
+    from unittest import mock
+    import conversation_logger as module
+    from conversation_logger import Conversation
+    with tempfile.TemporaryDirectory() as directory:
+        conversation_logger = _sqlite_logger(directory, QUEUE_SIZE=2)
+        assert conversation_logger.log_conversation("first", "answer")
+        assert conversation_logger.log_conversation("second", "answer")
+        with mock.patch.object(module.logger, 'warning') as warning:
+            assert conversation_logger.log_conversation("third", "answer") is None
+        warning.assert_called_once()
+        assert "queue full" in warning.call_args[0][0]
+        
+        conversation_logger.flush()
+        with conversation_logger.SessionLocal.begin() as session:
+            assert sorted(q for (q,) in session.query(Conversation.actual_query)) == ["first", "second"]
+        conversation_logger.engine.dispose()
+
+def _run_concurrently(flight, key, fn, callers=8):
+    """Call flight.do(key, fn) from several threads at once; returns each caller's result or exception"""
+    import threading
+    import time
+    outcomes, arrived = [], []
+    lock = threading.Lock()
+    
+    def leader_fn():
+        # Hold the call open until every other caller is waiting on it
+        while len(arrived) < callers:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        return fn()
+    
+    def caller(index):
+        with lock:
+            arrived.append(index)
+        try:
+            outcome = flight.do(key, leader_fn)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+    
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+def test_single_flight_shares_one_call():
+    """Concurrent callers share one invocation, its result or its exception, and the key is released after"""
+    from single_flight import SingleFlight
+    flight = SingleFlight()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        return object()
+    outcomes = _run_concurrently(flight, "query", compute)
+    assert len(calls) == 1
+    assert len(outcomes) == 8 and all(outcome is outcomes[0] for outcome in outcomes)
+    assert "query" not in flight._in_flight
+    
+    error = RuntimeError("live search failed")
+    def fail():
+        calls.append(1)
+        raise error
+    outcomes = _run_concurrently(flight, "query", fail)
+    assert len(calls) == 2
+    assert len(outcomes) == 8 and all(outcome is error for outcome in outcomes)
+    assert "query" not in flight._in_flight
+    
+    # Released keys run again
+    assert flight.do("query", lambda: "fresh") == "fresh"
+
+def test_embedder_is_opt_in_and_lazy():
+    """No semantic cache unless EMBEDDING_BACKEND opts in, and the embedder is built on first use"""
+    from unittest import mock
+    from response_cache import SEMANTIC
+    with mock.patch.dict(os.environ), mock.patch("chatbot.create_embedder") as create:
+        os.environ.pop("EMBEDDING_BACKEND", None)
+        bot = CUNYChatbot(_KB)
+        assert bot.response_cache.embed_fn is None
+        assert bot.response_cache.embed("tuition") is None
+        
+        os.environ["EMBEDDING_BACKEND"] = "local"
+        create.return_value.embed_one.side_effect = lambda text: [1.0, 0.0]
+        bot = CUNYChatbot(_KB)
+        create.assert_not_called()
+        bot.response_cache.put("what is tuition", "answer")
+        assert bot.response_cache.lookup("tuition cost?") == ("answer", SEMANTIC)
+        create.assert_called_once()
+        
+        # An unavailable backend turns the semantic tier off instead of retrying
+        create.reset_mock(return_value=True, side_effect=True)
+        create.return_value = None
+        bot = CUNYChatbot(_KB)
+        assert bot.response_cache.embed("tuition") is None
+        assert bot.response_cache.embed_fn is None
+        create.assert_called_once()
+
+def test_page_cache_drops_expired_pages():
+    """save_cache() deletes pages older than CACHE_EXPIRY_HOURS; load_cache() skips them"""
+    import tempfile
+    import time
+    from contextlib import closing
+    from unittest import mock
+    import web_Scraper
+    with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(web_Scraper, "CACHE_FILE", os.path.join(directory, "pages.sqlite")):
+        web_Scraper.save_cache({"https://www.cuny.edu/old": "old page"})
+        stale = time.time() - web_Scraper.CACHE_EXPIRY_HOURS * 3600 - 60
+        with closing(web_Scraper._cache_connection()) as conn, conn:
+            conn.execute("UPDATE pages SET ts = ?", (stale,))
+        assert web_Scraper.load_cache() is None
+        
+        web_Scraper.save_cache({"https://www.cuny.edu/new": "new page"})
+        assert web_Scraper.load_cache() == {"https://www.cuny.edu/new": "new page"}
+        with closing(web_Scraper._cache_connection()) as conn:
+            assert [url for (url,) in conn.execute("SELECT url FROM pages")] == ["https://www.cuny.edu/new"]
+
 def main():
     """Run all tests"""
     print("Starting CUNY Chatbot Tests...\n")
@@ -138,6 +542,23 @@ def main():
         test_chatbot_fallback()
         test_quick_responses()
         test_data_integrity()
+        test_scraper_extract_xhtml()
+        test_scraper_extract_empty()
+        test_chat_stream_events()
+        test_chat_stream_error_event()
+        test_response_cache_exact_tier()
+        test_response_cache_semantic_threshold()
+        test_response_cache_ttl()
+        test_response_cache_eviction()
+        test_fallback_and_error_answers_not_cached()
+        test_keyword_matcher_matches_substring_search()
+        test_chatbot_classifier_cases()
+        test_search_rankings()
+        test_conversation_logger_sqlite()
+        test_conversation_logger_queue_full()
+        test_single_flight_shares_one_call()
+        test_embedder_is_opt_in_and_lazy()
+        test_page_cache_drops_expired_pages()
         
         print("All tests completed successfully!")
         print("\n Summary:")